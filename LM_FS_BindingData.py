@@ -0,0 +1,242 @@
+# LM LM_GPFollowShapes: Make Grease Pencil follow mesh animation
+# Copyright (C) 2025 Luca Malisan
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Binding data stored on the drawings, and its export to .npz files
+
+import json
+import hashlib
+import numpy as np
+from mathutils import Vector
+from mathutils.kdtree import KDTree
+from .LM_FS_MeshSnapshot import matrix_to_numpy, transform_points
+from .LM_FS_DrawingData import read_attribute, write_attribute, remove_attributes, read_positions, drawing_point_count
+from .LM_FS_EnvelopeWeights import frame_drawings
+from .LM_FS_RigBuilder import LM_FS_Control
+from .LM_FS_SurfaceBind import binding_attribute_names, vertex_attribute_names, triangle_coordinates, evaluate_surface_binding, read_surface_binding, write_surface_binding, write_surface_vertices, clear_surface_binding
+
+BINDING_FILE_VERSION = 1
+
+
+def control_attribute_names(prefix):
+    """Names of the drawing attributes holding the rig binding: the control of each point, its place on the mesh and its merge radius"""
+    return (prefix + "bind_ctrl", prefix + "ctrl_tri", prefix + "ctrl_bary", prefix + "ctrl_offset", prefix + "ctrl_radius")
+
+
+def write_control_binding(target_gp, frame_number, prefix, snapshot, controls):
+    """Store the rig binding of the drawings keyed at frame_number.
+
+    Each point gets the index of its nearest control in controls, and the
+    triangle, barycentric coordinates and normal offset of that control
+    on the mesh snapshot, with the radius of the controls merged into it.
+    Returns the number of points written.
+    """
+    drawings = frame_drawings(target_gp, frame_number)
+    if not controls:
+        for drawing in drawings:
+            clear_control_binding(drawing, prefix)
+        return 0
+
+    control_triangles = np.array([control.triangle for control in controls], dtype=np.int32)
+    control_positions = np.array([tuple(control.position) for control in controls], dtype=np.float32)
+    control_barycentrics, control_offsets = triangle_coordinates(snapshot, control_triangles, control_positions)
+    control_radii = np.array([control.radius for control in controls], dtype=np.float32)
+
+    kd = KDTree(len(controls))
+    for control_idx, co in enumerate(control_positions.tolist()):
+        kd.insert(co, control_idx)
+    kd.balance()
+
+    gp_to_world = matrix_to_numpy(target_gp.matrix_world)
+    index_name, tri_name, bary_name, offset_name, radius_name = control_attribute_names(prefix)
+    written_points = 0
+    for drawing in drawings:
+        positions = read_positions(drawing)
+        if positions is None or not len(positions):
+            continue
+        nearest = np.fromiter((kd.find(co)[1] for co in transform_points(gp_to_world, positions).tolist()), dtype=np.int32, count=len(positions))
+        write_attribute(drawing, index_name, 'INT', nearest)
+        write_attribute(drawing, tri_name, 'INT', control_triangles[nearest])
+        write_attribute(drawing, bary_name, 'FLOAT_VECTOR', control_barycentrics[nearest])
+        write_attribute(drawing, offset_name, 'FLOAT', control_offsets[nearest])
+        write_attribute(drawing, radius_name, 'FLOAT', control_radii[nearest])
+        written_points += len(positions)
+    return written_points
+
+
+def read_control_binding(drawing, prefix):
+    """Read the rig binding of a drawing, None if it isn't stored"""
+    index_name, tri_name, bary_name, offset_name, radius_name = control_attribute_names(prefix)
+    indices = read_attribute(drawing, index_name, 'INT')
+    triangles = read_attribute(drawing, tri_name, 'INT')
+    barycentrics = read_attribute(drawing, bary_name, 'FLOAT_VECTOR')
+    offsets = read_attribute(drawing, offset_name, 'FLOAT')
+    if indices is None or triangles is None or barycentrics is None or offsets is None:
+        return None
+    # Bindings stored before controls had a radius
+    radii = read_attribute(drawing, radius_name, 'FLOAT')
+    if radii is None:
+        radii = np.zeros(len(indices), dtype=np.float32)
+    return indices, triangles, barycentrics, offsets, radii
+
+
+def read_control_table(target_gp, frame_number, prefix):
+    """Controls stored on the drawings keyed at frame_number.
+
+    Returns the arrays (indices, triangles, barycentrics, offsets, radii)
+    with one row per control, or None when the frame has no stored rig
+    binding.
+    """
+    bindings = [read_control_binding(drawing, prefix) for drawing in frame_drawings(target_gp, frame_number)]
+    bindings = [binding for binding in bindings if binding is not None]
+    if not bindings:
+        return None
+    indices, triangles, barycentrics, offsets, radii = (np.concatenate(arrays) for arrays in zip(*bindings))
+    indices, first = np.unique(indices, return_index=True)
+    return indices, triangles[first], barycentrics[first], offsets[first], radii[first]
+
+
+def restore_controls(snapshot, control_table, name_prefix):
+    """Controls of a stored rig binding, placed on the mesh snapshot without any nearest face search.
+
+    Each control is named name_prefix followed by its index. Controls on
+    triangles missing from the snapshot are dropped.
+    """
+    indices, triangles, barycentrics, offsets, radii = control_table
+    valid = (triangles >= 0) & (triangles < len(snapshot.triangles))
+    indices, triangles, barycentrics, offsets, radii = indices[valid], triangles[valid], barycentrics[valid], offsets[valid], radii[valid]
+    positions = evaluate_surface_binding(snapshot, triangles, barycentrics, offsets)
+    return [LM_FS_Control(name_prefix + str(control_idx), Vector(position), triangle, snapshot.triangles[triangle].tolist(), radius)
+            for control_idx, triangle, position, radius in zip(indices.tolist(), triangles.tolist(), positions.tolist(), radii.tolist())]
+
+
+def clear_control_binding(drawing, prefix):
+    """Remove the rig binding attributes from a drawing"""
+    remove_attributes(drawing, control_attribute_names(prefix))
+
+
+def save_frame_binding(target_gp, frame_number, prefix):
+    """Copy of the rig and surface binding attributes of the drawings keyed at frame_number.
+
+    Returns one dictionary per drawing, attribute name to (data type,
+    values), to put back with restore_frame_binding.
+    """
+    names = control_attribute_names(prefix) + binding_attribute_names(prefix) + vertex_attribute_names(prefix)
+    saved = []
+    for drawing in frame_drawings(target_gp, frame_number):
+        attributes = {}
+        for name in names:
+            attribute = drawing.attributes.get(name)
+            if attribute is not None:
+                attributes[name] = (attribute.data_type, read_attribute(drawing, name, attribute.data_type))
+        saved.append(attributes)
+    return saved
+
+
+def restore_frame_binding(target_gp, frame_number, prefix, saved):
+    """Put back the binding attributes copied by save_frame_binding, removing the ones written since"""
+    names = control_attribute_names(prefix) + binding_attribute_names(prefix) + vertex_attribute_names(prefix)
+    for drawing, attributes in zip(frame_drawings(target_gp, frame_number), saved):
+        remove_attributes(drawing, names)
+        for name, (data_type, values) in attributes.items():
+            write_attribute(drawing, name, data_type, values)
+
+
+def topology_signature(snapshot):
+    """Vertex and triangle counts of a mesh snapshot, with a hash of its triangles"""
+    return {
+        "vertices": int(len(snapshot.vertices)),
+        "triangles": int(len(snapshot.triangles)),
+        "hash": hashlib.sha1(np.ascontiguousarray(snapshot.triangles, dtype=np.int32).tobytes()).hexdigest(),
+    }
+
+
+def export_binding(filepath, target_gp, prefix, snapshot):
+    """Write the binding stored on the drawings of the target to a .npz file.
+
+    Drawings are identified by layer name and keyframe number. The
+    topology of the source mesh is saved with them, so the binding is only
+    applied to the same mesh. Nothing is written when no drawing has a
+    stored binding. Returns the number of drawings exported.
+    """
+    arrays = {}
+    drawings = []
+    for layer in target_gp.data.layers:
+        for frame in layer.frames:
+            key = "d" + str(len(drawings))
+            control_binding = read_control_binding(frame.drawing, prefix)
+            surface_binding = read_surface_binding(frame.drawing, prefix)
+            if control_binding is not None:
+                kind = 'RIG'
+                arrays[key + "_ctrl"], arrays[key + "_tri"], arrays[key + "_bary"], arrays[key + "_offset"], arrays[key + "_radius"] = control_binding
+            elif surface_binding is not None:
+                kind = 'SURFACE'
+                arrays[key + "_tri"], arrays[key + "_bary"], arrays[key + "_offset"] = surface_binding
+            else:
+                continue
+            drawings.append({"key": key, "layer": layer.name, "frame": frame.frame_number, "points": drawing_point_count(frame.drawing), "kind": kind})
+    if not drawings:
+        return 0
+
+    meta = {"version": BINDING_FILE_VERSION, "target": target_gp.name, "topology": topology_signature(snapshot), "drawings": drawings}
+    np.savez_compressed(filepath, meta=np.array(json.dumps(meta)), **arrays)
+    return len(drawings)
+
+
+def import_binding(filepath, target_gp, prefix, snapshot):
+    """Store the binding of a .npz file on the matching drawings of the target.
+
+    Raises ValueError when the file was exported from a mesh of another
+    topology. Drawings whose layer, keyframe or point count don't match
+    are skipped. Returns the frame numbers imported for each kind
+    ('RIG' and 'SURFACE') and the number of drawings skipped.
+    """
+    with np.load(filepath) as data:
+        meta = json.loads(str(data["meta"]))
+        if meta.get("version") != BINDING_FILE_VERSION:
+            raise ValueError("Unsupported binding file version: " + str(meta.get("version")))
+        if meta["topology"] != topology_signature(snapshot):
+            raise ValueError("The binding was made on a mesh with a different topology")
+
+        frames = {'RIG': set(), 'SURFACE': set()}
+        skipped = 0
+        for entry in meta["drawings"]:
+            layer = target_gp.data.layers.get(entry["layer"])
+            frame = next((frame for frame in layer.frames if frame.frame_number == entry["frame"]), None) if layer is not None else None
+            if frame is None or drawing_point_count(frame.drawing) != entry["points"]:
+                skipped += 1
+                continue
+
+            key = entry["key"]
+            triangles, barycentrics, offsets = data[key + "_tri"], data[key + "_bary"], data[key + "_offset"]
+            if entry["kind"] == 'RIG':
+                clear_surface_binding(frame.drawing, prefix)
+                index_name, tri_name, bary_name, offset_name, radius_name = control_attribute_names(prefix)
+                write_attribute(frame.drawing, index_name, 'INT', data[key + "_ctrl"])
+                write_attribute(frame.drawing, tri_name, 'INT', triangles)
+                write_attribute(frame.drawing, bary_name, 'FLOAT_VECTOR', barycentrics)
+                write_attribute(frame.drawing, offset_name, 'FLOAT', offsets)
+                # Files exported before controls had a radius
+                if key + "_radius" in data.files:
+                    write_attribute(frame.drawing, radius_name, 'FLOAT', data[key + "_radius"])
+                else:
+                    remove_attributes(frame.drawing, (radius_name,))
+            else:
+                clear_control_binding(frame.drawing, prefix)
+                write_surface_binding(frame.drawing, prefix, triangles, barycentrics, offsets)
+                write_surface_vertices(frame.drawing, prefix, snapshot, triangles)
+            frames[entry["kind"]].add(entry["frame"])
+
+    return frames, skipped
@@ -0,0 +1,156 @@
+# LM LM_GPFollowShapes: Make Grease Pencil follow mesh animation
+# Copyright (C) 2025 Luca Malisan
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Selection of the drawing points that become rig controls
+
+import bpy
+import numpy as np
+from mathutils import Vector
+from .LM_FS_MeshSnapshot import matrix_to_numpy, transform_points
+from .LM_FS_DrawingData import read_positions, read_curve_offsets
+
+
+def create_simplified_gp(context, target_gp):
+    """Duplicate the target grease pencil and simplify all its keyframes.
+
+    The copy is meant to be shared by all the frames of a bind and must be
+    released with remove_simplified_gp when done.
+    """
+    # Check if we are in Blender 4.3 or later
+    def is_GP3():
+        return hasattr(target_gp.data.layers[0].frames[0], 'drawing')
+
+    # Duplicate the target grease pencil object
+    new_gp = target_gp.copy()
+    new_gp.data = target_gp.data.copy()
+    context.collection.objects.link(new_gp)
+
+    # Add simplify modifier to the duplicated grease pencil
+    if is_GP3():
+        simplify_modifier = new_gp.modifiers.new(name="Simplify", type='GREASE_PENCIL_SIMPLIFY')
+    else:
+        simplify_modifier = new_gp.grease_pencil_modifiers.new(name="Simplify", type='GP_SIMPLIFY')
+    simplify_modifier.mode = 'ADAPTIVE'
+    simplify_modifier.factor = max(1.0, float(context.scene.lm_fs_simplify))/1000
+
+    # Apply the simplify modifier
+    bpy.context.view_layer.objects.active = new_gp
+    if is_GP3():
+        bpy.ops.object.modifier_apply(modifier=simplify_modifier.name, all_keyframes=True)
+    else:
+        bpy.ops.object.modifier_apply(modifier=simplify_modifier.name)
+
+    return new_gp
+
+
+def remove_simplified_gp(simplified_gp):
+    """Delete a simplified copy together with its grease pencil data"""
+    gp_data = simplified_gp.data
+    bpy.data.objects.remove(simplified_gp, do_unlink=True)
+    if gp_data.users == 0:
+        bpy.data.batch_remove([gp_data])
+
+
+def group_representatives(points, keys):
+    """Pick one representative point per group of points sharing the same key.
+
+    keys is an (N, K) integer array. The representative of a group is its
+    point nearest to the centroid of the group points. Returns the sorted
+    indices of the chosen points.
+    """
+    _keys, group_of_point, counts = np.unique(keys, axis=0, return_inverse=True, return_counts=True)
+    group_of_point = group_of_point.ravel()
+
+    centroids = np.stack([np.bincount(group_of_point, weights=points[:, axis], minlength=len(counts)) for axis in range(3)], axis=1)
+    centroids /= counts[:, None]
+    distances = np.einsum("ij,ij->i", points - centroids[group_of_point], points - centroids[group_of_point])
+
+    # Sort by group then by distance, the first point of each group wins
+    order = np.lexsort((distances, group_of_point))
+    first_in_group = np.ones(len(order), dtype=bool)
+    first_in_group[1:] = group_of_point[order][1:] != group_of_point[order][:-1]
+    return np.sort(order[first_in_group])
+
+
+def voxel_cluster(points, spacing):
+    """Pick one representative point per cell of a voxel grid of the given spacing.
+
+    The representative of a cell is its point nearest to the centroid of
+    the cell points. Returns the sorted indices of the chosen points.
+    """
+    if len(points) == 0 or spacing <= 0.0:
+        return np.arange(len(points))
+    return group_representatives(points, np.floor(points / spacing).astype(np.int64))
+
+
+def merge_controls(controls, tolerance=0.0):
+    """Keep one control per group of controls driven alike.
+
+    Controls are grouped by triangle, or by cells of a grid of the given
+    tolerance when it is positive. The control nearest to the centroid of
+    its group is kept, with its own triangle, and its radius set to the
+    distance to the farthest control of the group. Returns the kept
+    controls in their original order.
+    """
+    if len(controls) < 2:
+        return list(controls)
+    positions = np.array([tuple(control.position) for control in controls], dtype=np.float64)
+    if tolerance > 0.0:
+        keys = np.floor(positions / tolerance).astype(np.int64)
+    else:
+        keys = np.array([[control.triangle] for control in controls], dtype=np.int64)
+    kept = group_representatives(positions, keys)
+
+    # The kept control stands for its whole group, its bone has to reach the points of the dropped ones
+    _keys, group_of_point = np.unique(keys, axis=0, return_inverse=True)
+    group_of_point = group_of_point.ravel()
+    kept_of_group = np.empty(len(kept), dtype=np.int64)
+    kept_of_group[group_of_point[kept]] = kept
+    spread = np.linalg.norm(positions - positions[kept_of_group[group_of_point]], axis=1)
+    radii = np.zeros(len(kept))
+    np.maximum.at(radii, group_of_point, spread)
+
+    merged = []
+    for idx in kept.tolist():
+        control = controls[idx]
+        control.radius = float(radii[group_of_point[idx]])
+        merged.append(control)
+    return merged
+
+
+def cluster_control_points(target_gp, frame_number, spacing):
+    """Control points of the drawings keyed at frame_number, one per voxel of the given spacing.
+
+    Works on the target directly, without copying it. Yields
+    (layer_idx, stroke_idx, point_idx, world_position) for each control.
+    """
+    gp_to_world = matrix_to_numpy(target_gp.matrix_world)
+    for layer_idx, layer in enumerate(target_gp.data.layers):
+        for frame in layer.frames:
+            if frame.frame_number != frame_number:
+                continue
+            positions = read_positions(frame.drawing)
+            if positions is None or not len(positions):
+                continue
+
+            world_positions = transform_points(gp_to_world, positions)
+            selected = voxel_cluster(world_positions, spacing)
+
+            # Stroke of each selected point, from the first point index of each stroke
+            offsets = read_curve_offsets(frame.drawing)
+            strokes = np.searchsorted(offsets, selected, side='right') - 1
+            for point, stroke in zip(selected.tolist(), strokes.tolist()):
+                yield layer_idx, stroke, point - int(offsets[stroke]), Vector(world_positions[point])
@@ -0,0 +1,92 @@
+# LM LM_GPFollowShapes: Make Grease Pencil follow mesh animation
+# Copyright (C) 2025 Luca Malisan
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Bulk access to Grease Pencil drawing point attributes (Blender 4.3+)
+
+import numpy as np
+
+
+# foreach_get/foreach_set property, numpy type and width of each attribute type
+ATTRIBUTE_ACCESS = {
+    'FLOAT': ("value", np.float32, 1),
+    'INT': ("value", np.int32, 1),
+    'FLOAT_VECTOR': ("vector", np.float32, 3),
+}
+
+
+def drawing_point_count(drawing):
+    """Number of points in a drawing"""
+    position = drawing.attributes.get("position")
+    return len(position.data) if position is not None else 0
+
+
+def read_attribute(drawing, name, data_type):
+    """Read a point attribute of a drawing into a numpy array, None if it doesn't exist"""
+    attribute = drawing.attributes.get(name)
+    if attribute is None:
+        return None
+    prop, dtype, width = ATTRIBUTE_ACCESS[data_type]
+    values = np.empty(len(attribute.data) * width, dtype=dtype)
+    attribute.data.foreach_get(prop, values)
+    return values.reshape(-1, width) if width > 1 else values
+
+
+def write_attribute(drawing, name, data_type, values):
+    """Write a numpy array to a point attribute of a drawing, creating it if needed"""
+    attribute = drawing.attributes.get(name)
+    if attribute is not None and attribute.data_type != data_type:
+        drawing.attributes.remove(attribute)
+        attribute = None
+    if attribute is None:
+        attribute = drawing.attributes.new(name, data_type, 'POINT')
+    prop, dtype, _width = ATTRIBUTE_ACCESS[data_type]
+    attribute.data.foreach_set(prop, np.ascontiguousarray(values, dtype=dtype).ravel())
+
+
+def remove_attributes(drawing, names):
+    """Remove the given attributes from a drawing, skipping the missing ones"""
+    for name in names:
+        attribute = drawing.attributes.get(name)
+        if attribute is not None:
+            drawing.attributes.remove(attribute)
+
+
+def read_positions(drawing):
+    """Point positions of a drawing in object space, as an (N, 3) array"""
+    return read_attribute(drawing, "position", 'FLOAT_VECTOR')
+
+
+def write_positions(drawing, positions):
+    """Write point positions of a drawing in object space"""
+    write_attribute(drawing, "position", 'FLOAT_VECTOR', positions)
+    if hasattr(drawing, "tag_positions_changed"):
+        drawing.tag_positions_changed()
+
+
+def read_curve_offsets(drawing):
+    """Index of the first point of each stroke of a drawing, followed by the point count"""
+    offsets = np.empty(len(drawing.curve_offsets), dtype=np.int32)
+    drawing.curve_offsets.foreach_get("value", offsets)
+    return offsets
+
+
+def frame_at(layer, frame_number):
+    """Keyframe of a layer that is shown at frame_number, None if there's none yet"""
+    shown_frame = None
+    for frame in layer.frames:
+        if frame.frame_number <= frame_number and (shown_frame is None or frame.frame_number > shown_frame.frame_number):
+            shown_frame = frame
+    return shown_frame
@@ -0,0 +1,216 @@
+# LM LM_GPFollowShapes: Make Grease Pencil follow mesh animation
+# Copyright (C) 2025 Luca Malisan
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Envelope weights computed with numpy and written to the drawing attributes
+
+import numpy as np
+from mathutils.kdtree import KDTree
+from .LM_FS_MeshSnapshot import matrix_to_numpy, transform_points
+from .LM_FS_DrawingData import read_positions, read_attribute, write_attribute, remove_attributes
+
+
+def envelope_weights(points, head, tail, head_radius, tail_radius, distance):
+    """Envelope weights of one bone for an (N, 3) array of points.
+
+    Same falloff as Blender's envelope deform: full weight inside the bone
+    radius, fading to zero at the envelope distance outside of it.
+    """
+    axis = tail - head
+    length = np.linalg.norm(axis)
+    to_head = points - head
+    head_dist_sq = np.einsum("ij,ij->i", to_head, to_head)
+
+    if length > 1e-8:
+        along = to_head @ axis / length
+        factor = np.clip(along / length, 0.0, 1.0)
+        tail_dist_sq = np.einsum("ij,ij->i", points - tail, points - tail)
+        dist_sq = np.where(along < 0.0, head_dist_sq, np.where(along > length, tail_dist_sq, head_dist_sq - along * along))
+        radius = factor * tail_radius + (1.0 - factor) * head_radius
+    else:
+        dist_sq = head_dist_sq
+        radius = np.full(len(points), head_radius)
+
+    weights = np.zeros(len(points), dtype=np.float32)
+    inside = dist_sq < radius * radius
+    weights[inside] = 1.0
+    if distance > 0.0:
+        falloff = ~inside & (dist_sq < (radius + distance) ** 2)
+        outside = np.sqrt(np.maximum(dist_sq[falloff], 0.0)) - radius[falloff]
+        weights[falloff] = 1.0 - (outside * outside) / (distance * distance)
+    return weights
+
+
+def frame_drawings(target_gp, frame_number):
+    """Drawings of all the layers keyed at frame_number"""
+    return [frame.drawing for layer in target_gp.data.layers for frame in layer.frames if frame.frame_number == frame_number]
+
+
+def apply_envelope_weights(target_gp, armature_obj, frame_number, bones=None):
+    """Write envelope weights of the bones to the drawings keyed at frame_number.
+
+    Only points within reach of a bone are evaluated, found through a
+    KD-tree over the drawing points. Vertex groups are created on the
+    target when missing. Returns the number of bones with any weight.
+    """
+    bones = list(armature_obj.data.bones if bones is None else bones)
+    drawings = frame_drawings(target_gp, frame_number)
+
+    # All the points of the frame in world space, with the start of each drawing
+    gp_to_world = matrix_to_numpy(target_gp.matrix_world)
+    drawing_positions = [read_positions(drawing) for drawing in drawings]
+    drawing_positions = [np.zeros((0, 3), dtype=np.float32) if positions is None else positions for positions in drawing_positions]
+    drawing_starts = np.cumsum([0] + [len(positions) for positions in drawing_positions])
+    if drawing_starts[-1] == 0 or not bones:
+        return 0
+    points = transform_points(gp_to_world, np.concatenate(drawing_positions))
+
+    kd = KDTree(len(points))
+    for point_idx, co in enumerate(points.tolist()):
+        kd.insert(co, point_idx)
+    kd.balance()
+
+    armature_to_world = matrix_to_numpy(armature_obj.matrix_world)
+    heads = transform_points(armature_to_world, np.array([bone.head_local for bone in bones], dtype=np.float32))
+    tails = transform_points(armature_to_world, np.array([bone.tail_local for bone in bones], dtype=np.float32))
+
+    weighted_bones = 0
+    for bone, head, tail in zip(bones, heads, tails):
+        vertex_group = target_gp.vertex_groups.get(bone.name)
+        existing_group = vertex_group is not None
+
+        # Only points within the bone reach are candidates
+        reach = np.linalg.norm(tail - head) * 0.5 + max(bone.head_radius, bone.tail_radius) + bone.envelope_distance
+        candidates = np.fromiter((index for _co, index, _dist in kd.find_range(((head + tail) * 0.5).tolist(), reach)), dtype=np.int64)
+        if len(candidates):
+            weights = envelope_weights(points[candidates], head, tail, bone.head_radius, bone.tail_radius, bone.envelope_distance)
+            reached = weights > 0.0
+            candidates, weights = candidates[reached], weights[reached]
+        else:
+            weights = np.zeros(0, dtype=np.float32)
+
+        if not len(candidates) and not existing_group:
+            continue
+        if len(candidates):
+            weighted_bones += 1
+        if not existing_group:
+            vertex_group = target_gp.vertex_groups.new(name=bone.name)
+
+        # Write the full weights of each drawing, clearing stale weights of existing groups
+        candidate_drawings = np.searchsorted(drawing_starts, candidates, side='right') - 1
+        for drawing_idx, drawing in enumerate(drawings):
+            in_drawing = candidate_drawings == drawing_idx
+            if not in_drawing.any() and not existing_group:
+                continue
+            values = np.zeros(drawing_starts[drawing_idx + 1] - drawing_starts[drawing_idx], dtype=np.float32)
+            values[candidates[in_drawing] - drawing_starts[drawing_idx]] = weights[in_drawing]
+            write_attribute(drawing, vertex_group.name, 'FLOAT', values)
+
+    return weighted_bones
+
+
+def limit_weights(weights, max_influences=0, min_weight=0.0):
+    """Prune an (N, G) array of point weights, one column per vertex group.
+
+    Weights below min_weight are dropped, except the strongest one of each
+    point so no point loses all of its influences. Then only the
+    max_influences strongest weights of each point are kept (0 = no
+    limit) and the weights of each point are normalized to sum to one.
+    """
+    limited = weights.copy()
+    rows = np.arange(len(limited))
+    if min_weight > 0.0:
+        weak = limited < min_weight
+        weak[rows, limited.argmax(axis=1)] = False
+        limited[weak] = 0.0
+    if 0 < max_influences < limited.shape[1]:
+        weakest = np.argpartition(-limited, max_influences, axis=1)[:, max_influences:]
+        limited[rows[:, None], weakest] = 0.0
+
+    totals = limited.sum(axis=1)
+    weighted = totals > 0.0
+    limited[weighted] /= totals[weighted, None]
+    return limited
+
+
+def remove_empty_groups(target_gp, names):
+    """Remove the vertex groups without any weight in all the drawings of the target.
+
+    Returns the number of vertex groups removed.
+    """
+    drawings = [frame.drawing for layer in target_gp.data.layers for frame in layer.frames]
+    empty_names = []
+    for name in names:
+        if all(values is None or not values.any() for values in (read_attribute(drawing, name, 'FLOAT') for drawing in drawings)):
+            empty_names.append(name)
+    if not empty_names:
+        return 0
+
+    for drawing in drawings:
+        remove_attributes(drawing, empty_names)
+    for name in empty_names:
+        vertex_group = target_gp.vertex_groups.get(name)
+        if vertex_group is not None:
+            target_gp.vertex_groups.remove(vertex_group)
+    return len(empty_names)
+
+
+def limit_influences(target_gp, frame_number, prefix, max_influences=0, min_weight=0.0):
+    """Prune the FollowShapes weights of the drawings keyed at frame_number.
+
+    The weights of each drawing are processed together as one array, see
+    limit_weights. Vertex groups left without weights are removed.
+    Returns the number of influences and of vertex groups removed.
+    """
+    group_names = [vertex_group.name for vertex_group in target_gp.vertex_groups if not vertex_group.lock_weight and vertex_group.name.startswith(prefix)]
+    removed_influences = 0
+    emptied_names = set()
+    for drawing in frame_drawings(target_gp, frame_number):
+        names = [name for name in group_names if drawing.attributes.get(name) is not None]
+        if not names:
+            continue
+        weights = np.stack([read_attribute(drawing, name, 'FLOAT') for name in names], axis=1)
+        limited = limit_weights(weights, max_influences, min_weight)
+        removed_influences += int(np.count_nonzero(weights > 0.0) - np.count_nonzero(limited > 0.0))
+
+        for column in np.flatnonzero(np.any(limited != weights, axis=0)):
+            write_attribute(drawing, names[column], 'FLOAT', limited[:, column])
+        emptied_names.update(names[column] for column in np.flatnonzero(~limited.any(axis=0)))
+
+    return removed_influences, remove_empty_groups(target_gp, emptied_names)
+
+
+def limit_scene_influences(scene, target_gp, frame_number):
+    """Apply the influence limits set in the scene to a frame, returns (0, 0) when they are off"""
+    if scene.lm_fs_max_influences <= 0 and scene.lm_fs_min_weight <= 0.0:
+        return 0, 0
+    return limit_influences(target_gp, frame_number, scene.lm_fs_prefix, scene.lm_fs_max_influences, scene.lm_fs_min_weight)
+
+
+def add_armature_modifier(target_gp, armature_obj):
+    """Deform the target with the armature, as parent_set(type='ARMATURE_ENVELOPE') would"""
+    for modifier in target_gp.modifiers:
+        if modifier.type == 'GREASE_PENCIL_ARMATURE' and modifier.object == armature_obj:
+            return modifier
+
+    modifier = target_gp.modifiers.new(name=armature_obj.name, type='GREASE_PENCIL_ARMATURE')
+    modifier.object = armature_obj
+    modifier.use_vertex_groups = True
+    modifier.use_bone_envelopes = False
+
+    target_gp.parent = armature_obj
+    target_gp.parent_type = 'OBJECT'
+    target_gp.matrix_parent_inverse = armature_obj.matrix_world.inverted_safe()
+    return modifier
@@ -0,0 +1,101 @@
+# LM LM_GPFollowShapes: Make Grease Pencil follow mesh animation
+# Copyright (C) 2025 Luca Malisan
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Content hash of the inputs of a frame bind, to skip unchanged frames on rebind
+
+import hashlib
+import struct
+import numpy as np
+from .LM_FS_DrawingData import read_positions
+
+# Custom property on the generated rig holding the fingerprint of each of its frames
+FINGERPRINT_PROP = "lm_fs_fingerprint"
+
+
+def settings_fingerprint(*values):
+    """Short hash of a few setting values"""
+    return hashlib.sha1(repr(values).encode()).hexdigest()[:16]
+
+
+def envelope_fingerprint(scene):
+    """Hash of the envelope setting, which Change envelope distance applies in place"""
+    return settings_fingerprint(scene.lm_fs_expand)
+
+
+def limits_fingerprint(scene):
+    """Hash of the influence limits, which Limit Influences applies in place"""
+    return settings_fingerprint(scene.lm_fs_max_influences, scene.lm_fs_min_weight)
+
+
+def frame_fingerprint(scene, target_gp, snapshot, frame_number):
+    """Hash of everything a frame bind depends on.
+
+    Covers the drawing points keyed at frame_number, the evaluated source
+    mesh in that frame (snapshot) and the binding settings. The settings
+    that can be applied to an existing rig get their own parts, after
+    colons, so refresh_fingerprint can update them.
+    """
+    digest = hashlib.sha1()
+    for layer_idx, layer in enumerate(target_gp.data.layers):
+        for frame in layer.frames:
+            if frame.frame_number != frame_number:
+                continue
+            digest.update(struct.pack("<i", layer_idx))
+            # compatibilty with 4.2/4.4
+            if hasattr(frame, 'drawing'):
+                positions = read_positions(frame.drawing)
+                if positions is not None:
+                    digest.update(positions.tobytes())
+            else:
+                for stroke in frame.strokes:
+                    digest.update(struct.pack("<i", len(stroke.points)))
+                    for point in stroke.points:
+                        digest.update(struct.pack("<3f", *point.co))
+
+    digest.update(np.array(target_gp.matrix_world, dtype=np.float32).tobytes())
+    digest.update(snapshot.vertices.tobytes())
+    digest.update(snapshot.triangles.tobytes())
+    digest.update(repr((scene.lm_fs_bind_mode, scene.lm_fs_distance, scene.lm_fs_control_selection, scene.lm_fs_simplify, scene.lm_fs_spacing, scene.lm_fs_merge_controls, scene.lm_fs_merge_tolerance)).encode())
+    return ":".join((digest.hexdigest(), envelope_fingerprint(scene), limits_fingerprint(scene)))
+
+
+def stored_fingerprint(rig, frame_number):
+    """Fingerprint of a frame stored on its rig, None if there's none"""
+    fingerprints = rig.get(FINGERPRINT_PROP)
+    if fingerprints is None or isinstance(fingerprints, str):
+        return None
+    return fingerprints.get(str(frame_number))
+
+
+def store_fingerprint(rig, frame_number, fingerprint):
+    """Store the fingerprint of a frame on its rig, keyed by frame number"""
+    fingerprints = rig.get(FINGERPRINT_PROP)
+    if fingerprints is None or isinstance(fingerprints, str):
+        rig[FINGERPRINT_PROP] = {}
+    rig[FINGERPRINT_PROP][str(frame_number)] = fingerprint
+
+
+def refresh_fingerprint(scene, rig, frame_number, envelope=True, limits=True):
+    """Update the stored fingerprint of a frame after its envelopes or limits were applied in place"""
+    fingerprint = stored_fingerprint(rig, frame_number)
+    if fingerprint is None or fingerprint.count(":") != 2:
+        return
+    base, envelope_part, limits_part = fingerprint.split(":")
+    if envelope:
+        envelope_part = envelope_fingerprint(scene)
+    if limits:
+        limits_part = limits_fingerprint(scene)
+    store_fingerprint(rig, frame_number, ":".join((base, envelope_part, limits_part)))
@@ -0,0 +1,46 @@
+# LM LM_GPFollowShapes: Make Grease Pencil follow mesh animation
+# Copyright (C) 2025 Luca Malisan
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Plan of the keyframes processed by the All Frames operators
+
+from .LM_FS_DrawingData import drawing_point_count
+
+
+def plan_keyframes(target_gp):
+    """Unique keyframe numbers of all the layers, sorted, with the number of points keyed at each.
+
+    Returns a list of (frame_number, point_count). A frame keyed on several
+    layers appears once, so it is processed once.
+    """
+    points_per_frame = {}
+    for layer in target_gp.data.layers:
+        for frame in layer.frames:
+            # compatibilty with 4.2/4.4
+            if hasattr(frame, 'drawing'):
+                point_count = drawing_point_count(frame.drawing)
+            else:
+                point_count = sum(len(stroke.points) for stroke in frame.strokes)
+            points_per_frame[frame.frame_number] = points_per_frame.get(frame.frame_number, 0) + point_count
+    return sorted(points_per_frame.items())
+
+
+def describe_plan(plan, detailed=False):
+    """One line summary of a keyframe plan, optionally listing every frame"""
+    total_points = sum(point_count for _frame_number, point_count in plan)
+    description = f"{len(plan)} frames, {total_points} points"
+    if detailed:
+        description += ". Frames (points): " + ", ".join(f"{frame_number} ({point_count})" for frame_number, point_count in plan)
+    return description
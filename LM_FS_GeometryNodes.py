@@ -0,0 +1,159 @@
+# LM LM_GPFollowShapes: Make Grease Pencil follow mesh animation
+# Copyright (C) 2025 Luca Malisan
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Geometry Nodes backend for the surface binding (Blender 4.3+)
+
+import bpy
+from .LM_FS_SurfaceBind import binding_attribute_names, vertex_attribute_names
+
+SURFACE_BIND_NAME = "SurfaceBind"
+
+
+def surface_bind_modifier_name(prefix):
+    """Name of the node group and of the modifier installed on the target"""
+    return prefix + SURFACE_BIND_NAME
+
+
+def build_surface_bind_node_group(name, prefix):
+    """Create the node group that moves bound points onto their source triangles.
+
+    The binding captured at bind time is read from the drawing attributes:
+    the three vertex indices of the triangle, the barycentric coordinates
+    and the offset along the triangle normal. Triangle corners are sampled
+    from the source mesh in the space of the modified object.
+    """
+    tri_name, bary_name, offset_name = binding_attribute_names(prefix)
+
+    node_group = bpy.data.node_groups.new(name, 'GeometryNodeTree')
+    node_group.interface.new_socket("Geometry", in_out='INPUT', socket_type='NodeSocketGeometry')
+    node_group.interface.new_socket("Source", in_out='INPUT', socket_type='NodeSocketObject')
+    node_group.interface.new_socket("Geometry", in_out='OUTPUT', socket_type='NodeSocketGeometry')
+    nodes = node_group.nodes
+    links = node_group.links
+
+    def add_node(node_type, x, y):
+        node = nodes.new(node_type)
+        node.location = (x * 200, y * -150)
+        return node
+
+    def named_attribute(attribute_name, data_type, y):
+        node = add_node('GeometryNodeInputNamedAttribute', 0, y)
+        node.data_type = data_type
+        node.inputs["Name"].default_value = attribute_name
+        return node.outputs["Attribute"]
+
+    def vector_math(operation, x, y, a, b=None, scale=None):
+        node = add_node('ShaderNodeVectorMath', x, y)
+        node.operation = operation
+        links.new(a, node.inputs[0])
+        if b is not None:
+            links.new(b, node.inputs[1])
+        if scale is not None:
+            links.new(scale, node.inputs[3])
+        return node.outputs["Vector"]
+
+    group_input = add_node('NodeGroupInput', -1, 0)
+    group_output = add_node('NodeGroupOutput', 9, 0)
+
+    object_info = add_node('GeometryNodeObjectInfo', 0, 1)
+    object_info.transform_space = 'RELATIVE'
+    links.new(group_input.outputs["Source"], object_info.inputs["Object"])
+    mesh_position = add_node('GeometryNodeInputPosition', 0, 2)
+
+    # Triangle corners on the evaluated source mesh
+    corners = []
+    for corner_idx, vertex_name in enumerate(vertex_attribute_names(prefix)):
+        sample = add_node('GeometryNodeSampleIndex', 1, 3 + corner_idx * 2)
+        sample.data_type = 'FLOAT_VECTOR'
+        sample.domain = 'POINT'
+        links.new(object_info.outputs["Geometry"], sample.inputs["Geometry"])
+        links.new(mesh_position.outputs["Position"], sample.inputs["Value"])
+        links.new(named_attribute(vertex_name, 'INT', 3 + corner_idx * 2), sample.inputs["Index"])
+        corners.append(sample.outputs["Value"])
+
+    # Barycentric interpolation of the corners
+    barycentrics = named_attribute(bary_name, 'FLOAT_VECTOR', 9)
+    separate = add_node('ShaderNodeSeparateXYZ', 1, 9)
+    links.new(barycentrics, separate.inputs["Vector"])
+    weighted = [vector_math('SCALE', 2, 3 + i * 2, corner, scale=separate.outputs[i]) for i, corner in enumerate(corners)]
+    position = vector_math('ADD', 3, 4, weighted[0], weighted[1])
+    position = vector_math('ADD', 4, 5, position, weighted[2])
+
+    # Offset along the triangle normal
+    edge_1 = vector_math('SUBTRACT', 2, 10, corners[1], corners[0])
+    edge_2 = vector_math('SUBTRACT', 2, 11, corners[2], corners[0])
+    normal = vector_math('CROSS_PRODUCT', 3, 10, edge_1, edge_2)
+    normal = vector_math('NORMALIZE', 4, 10, normal)
+    offset = named_attribute(offset_name, 'FLOAT', 12)
+    position = vector_math('ADD', 6, 5, position, vector_math('SCALE', 5, 10, normal, scale=offset))
+
+    # Only bound points move: valid triangle and barycentrics summing to one
+    triangle_check = add_node('FunctionNodeCompare', 1, 13)
+    triangle_check.data_type = 'INT'
+    triangle_check.operation = 'GREATER_EQUAL'
+    links.new(named_attribute(tri_name, 'INT', 13), triangle_check.inputs[2])
+    triangle_check.inputs[3].default_value = 0
+
+    bary_sum = add_node('ShaderNodeVectorMath', 2, 14)
+    bary_sum.operation = 'DOT_PRODUCT'
+    links.new(barycentrics, bary_sum.inputs[0])
+    bary_sum.inputs[1].default_value = (1.0, 1.0, 1.0)
+    bary_check = add_node('FunctionNodeCompare', 3, 14)
+    bary_check.data_type = 'FLOAT'
+    bary_check.operation = 'GREATER_THAN'
+    links.new(bary_sum.outputs["Value"], bary_check.inputs[0])
+    bary_check.inputs[1].default_value = 0.5
+
+    selection = add_node('FunctionNodeBooleanMath', 4, 13)
+    selection.operation = 'AND'
+    links.new(triangle_check.outputs["Result"], selection.inputs[0])
+    links.new(bary_check.outputs["Result"], selection.inputs[1])
+
+    set_position = add_node('GeometryNodeSetPosition', 8, 0)
+    links.new(group_input.outputs["Geometry"], set_position.inputs["Geometry"])
+    links.new(selection.outputs["Boolean"], set_position.inputs["Selection"])
+    links.new(position, set_position.inputs["Position"])
+    links.new(set_position.outputs["Geometry"], group_output.inputs["Geometry"])
+
+    return node_group
+
+
+def ensure_surface_bind_node_group(prefix):
+    """Get the surface bind node group, creating it the first time"""
+    name = surface_bind_modifier_name(prefix)
+    node_group = bpy.data.node_groups.get(name)
+    if node_group is None or node_group.bl_idname != 'GeometryNodeTree':
+        node_group = build_surface_bind_node_group(name, prefix)
+    return node_group
+
+
+def install_surface_bind_modifier(target_gp, source_mesh, prefix):
+    """Add (or update) the single surface bind modifier of the target grease pencil"""
+    name = surface_bind_modifier_name(prefix)
+    modifier = target_gp.modifiers.get(name)
+    if modifier is None or modifier.type != 'NODES':
+        modifier = target_gp.modifiers.new(name=name, type='NODES')
+    modifier.node_group = ensure_surface_bind_node_group(prefix)
+    source_socket = modifier.node_group.interface.items_tree["Source"]
+    modifier[source_socket.identifier] = source_mesh
+    return modifier
+
+
+def remove_surface_bind_modifier(target_gp, prefix):
+    """Remove the surface bind modifier from the target grease pencil, if any"""
+    modifier = target_gp.modifiers.get(surface_bind_modifier_name(prefix))
+    if modifier is not None and modifier.type == 'NODES':
+        target_gp.modifiers.remove(modifier)
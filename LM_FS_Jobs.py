@@ -0,0 +1,67 @@
+# LM LM_GPFollowShapes: Make Grease Pencil follow mesh animation
+# Copyright (C) 2025 Luca Malisan
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Job list of the target grease pencils bound to the same source mesh in a single run
+
+import bpy
+
+
+def is_grease_pencil(_self, obj):
+    return obj.type in {'GPENCIL', 'GREASEPENCIL'}
+
+
+class LM_FS_Job(bpy.types.PropertyGroup):
+    """A target grease pencil of the job list"""
+    target: bpy.props.PointerProperty(
+        name="Target",
+        description="Grease Pencil bound to the source mesh",
+        type=bpy.types.Object,
+        poll=is_grease_pencil
+    )
+    enabled: bpy.props.BoolProperty(
+        name="Enabled",
+        description="Bind this target with Bind All Targets",
+        default=True
+    )
+
+
+class LM_FS_UL_Jobs(bpy.types.UIList):
+    """Targets of the job list"""
+    bl_idname = "LM_FS_UL_jobs"
+
+    def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
+        row = layout.row(align=True)
+        row.prop(item, "enabled", text="")
+        row.prop(item, "target", text="", emboss=False)
+
+
+def job_targets(scene):
+    """Enabled targets of the job list, each once, in list order"""
+    targets = []
+    for job in scene.lm_fs_jobs:
+        if job.enabled and job.target is not None and job.target not in targets:
+            targets.append(job.target)
+    return targets
+
+
+def register():
+    bpy.types.Scene.lm_fs_jobs = bpy.props.CollectionProperty(type=LM_FS_Job)
+    bpy.types.Scene.lm_fs_jobs_index = bpy.props.IntProperty(default=0)
+
+
+def unregister():
+    del bpy.types.Scene.lm_fs_jobs
+    del bpy.types.Scene.lm_fs_jobs_index
@@ -0,0 +1,142 @@
+# LM LM_GPFollowShapes: Make Grease Pencil follow mesh animation
+# Copyright (C) 2025 Luca Malisan
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Snapshot of the evaluated source mesh, shared by all point queries of a frame
+
+import numpy as np
+from contextlib import contextmanager
+from mathutils.bvhtree import BVHTree
+from .LM_FS_Profiler import count
+
+# Snapshot of the current frame kept for all the targets of a multi target bind, None outside of it
+_shared_snapshots = None
+
+
+def matrix_to_numpy(matrix):
+    """Convert a mathutils 4x4 matrix to a numpy array"""
+    return np.array(matrix, dtype=np.float32)
+
+
+def transform_points(matrix, points):
+    """Apply a 4x4 numpy matrix to an (N, 3) array of points"""
+    return points @ matrix[:3, :3].T + matrix[:3, 3]
+
+
+class LM_FS_MeshSnapshot:
+    """World space copy of the source mesh as evaluated in the current frame.
+
+    Vertex positions, triangles and face centers are read with foreach_get
+    from the depsgraph evaluated mesh, so shape keys and modifiers are
+    taken into account. Vertex indices refer to the evaluated mesh, which
+    matches the original mesh only when the modifier stack just deforms:
+    check deforms_only before using them on the mesh data.
+    """
+
+    def __init__(self, mesh_obj, depsgraph):
+        mesh_eval = mesh_obj.evaluated_get(depsgraph)
+        mesh = mesh_eval.to_mesh()
+        try:
+            mesh.calc_loop_triangles()
+
+            vertices = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+            mesh.vertices.foreach_get("co", vertices)
+
+            triangles = np.empty(len(mesh.loop_triangles) * 3, dtype=np.int32)
+            mesh.loop_triangles.foreach_get("vertices", triangles)
+
+            triangle_faces = np.empty(len(mesh.loop_triangles), dtype=np.int32)
+            mesh.loop_triangles.foreach_get("polygon_index", triangle_faces)
+
+            face_centers = np.empty(len(mesh.polygons) * 3, dtype=np.float32)
+            mesh.polygons.foreach_get("center", face_centers)
+        finally:
+            mesh_eval.to_mesh_clear()
+
+        matrix_world = matrix_to_numpy(mesh_eval.matrix_world)
+
+        self.vertices = transform_points(matrix_world, vertices.reshape(-1, 3))
+        self.triangles = triangles.reshape(-1, 3)
+        self.triangle_faces = triangle_faces
+        self.face_centers = transform_points(matrix_world, face_centers.reshape(-1, 3))
+        self.original_vertex_count = len(mesh_obj.data.vertices)
+
+        self._bvh = None
+
+    @property
+    def deforms_only(self):
+        """True when the evaluated vertices are the vertices of the mesh data, with the same indices.
+
+        Generative modifiers (Subdivision Surface, Remesh...) change the
+        vertex count, vertex indices then can't be used on the mesh data.
+        """
+        return len(self.vertices) == self.original_vertex_count
+
+    @property
+    def bvh(self):
+        """BVH tree of the triangles, built on first use"""
+        if self._bvh is None:
+            self._bvh = BVHTree.FromPolygons(self.vertices.tolist(), self.triangles.tolist(), all_triangles=True)
+        return self._bvh
+
+    def triangle_normals(self, triangles):
+        """Unit normals of the given triangles, as an (N, 3) array"""
+        a, b, c = (self.vertices[self.triangles[triangles, i]] for i in range(3))
+        normals = np.cross(b - a, c - a)
+        lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+        return normals / np.maximum(lengths, 1e-12)
+
+    def find_nearest(self, co, max_distance=0.0):
+        """Return the index of the triangle nearest to co.
+
+        max_distance is the search radius (0 = no limit). Returns None when
+        no triangle is found within it.
+        """
+        if max_distance > 0:
+            _location, _normal, triangle_index, _distance = self.bvh.find_nearest(co, max_distance)
+        else:
+            _location, _normal, triangle_index, _distance = self.bvh.find_nearest(co)
+        return triangle_index
+
+
+@contextmanager
+def shared_snapshots():
+    """Reuse the snapshot of the source mesh, and its BVH tree, for every target bound in the block.
+
+    Only the snapshot of the last requested frame is kept.
+    """
+    global _shared_snapshots
+    if _shared_snapshots is not None:
+        yield
+        return
+    _shared_snapshots = {}
+    try:
+        yield
+    finally:
+        _shared_snapshots = None
+
+
+def frame_snapshot(mesh_obj, depsgraph, frame_number):
+    """Snapshot of the source mesh at frame_number, shared inside a shared_snapshots block"""
+    if _shared_snapshots is None:
+        return LM_FS_MeshSnapshot(mesh_obj, depsgraph)
+    key = (mesh_obj.name, frame_number)
+    snapshot = _shared_snapshots.get(key)
+    if snapshot is None:
+        _shared_snapshots.clear()
+        snapshot = _shared_snapshots[key] = LM_FS_MeshSnapshot(mesh_obj, depsgraph)
+    else:
+        count("snapshots_reused")
+    return snapshot
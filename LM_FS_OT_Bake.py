@@ -0,0 +1,101 @@
+# LM LM_GPFollowShapes: Make Grease Pencil follow mesh animation
+# Copyright (C) 2025 Luca Malisan
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Bake the deformation of the target grease pencil to a point cache
+
+import bpy
+import time
+from .LM_FS_PointCache import POINT_CACHE_PROP, POINT_CACHE_MODIFIERS_PROP, bake_point_cache, open_point_cache, apply_point_cache, restore_rest_positions
+from .LM_FS_Profiler import profiled, log, count
+
+class LM_FS_OT_Bake(bpy.types.Operator):
+    """Bake the deformation of the target grease pencil to a point cache"""
+    bl_idname = "lm_fs.bake"
+    bl_label = "Bake to Point Cache"
+    bl_description = "Store the deformed points of the target grease pencil over the scene frame range and play them back without evaluating the rig"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    remove_rig: bpy.props.BoolProperty(
+        name="Remove rig",
+        description="Delete the FollowShapes rigs and bindings of the target after baking",
+        default=True
+    )
+
+    # main function
+    @profiled
+    def execute(self, context):
+        scene = context.scene
+        target_gp = scene.lm_fs_target_gp
+        prefix = scene.lm_fs_prefix
+
+        if not target_gp or target_gp.type != 'GREASEPENCIL':
+            self.report({'ERROR'}, "Baking requires a Grease Pencil target from Blender 4.3 or later")
+            return {'CANCELLED'}
+        if scene.lm_fs_cache_dir.startswith("//") and not bpy.data.filepath:
+            self.report({'ERROR'}, "Save the file before baking to a relative cache directory")
+            return {'CANCELLED'}
+
+        # One cache directory per target
+        cache_dir = scene.lm_fs_cache_dir.rstrip("/\\") + "/" + bpy.path.clean_name(target_gp.name)
+
+        # A previous bake would play back over the new one, and the rest positions would be its played ones
+        if POINT_CACHE_PROP in target_gp:
+            try:
+                restore_rest_positions(target_gp, target_gp[POINT_CACHE_PROP])
+            except (OSError, ValueError, KeyError) as e:
+                self.report({'ERROR'}, "Unable to restore the drawings from the previous bake: " + str(e))
+                return {'CANCELLED'}
+            bpy.ops.lm_fs.clear_bake()
+
+        # Only the FollowShapes deformation is baked, the other modifiers keep working on top of the cache
+        other_modifiers = [modifier for modifier in target_gp.modifiers if not modifier.name.startswith(prefix) and modifier.show_viewport]
+        for modifier in other_modifiers:
+            modifier.show_viewport = False
+
+        current_frame = scene.frame_current
+        start_time = time.perf_counter()
+        log("Baking", target_gp.name, "frames", scene.frame_start, "-", scene.frame_end, "to", cache_dir)
+        try:
+            baked_drawings = bake_point_cache(context, target_gp, cache_dir, scene.frame_start, scene.frame_end)
+            count("frames_baked", scene.frame_end - scene.frame_start + 1)
+            count("drawings_baked", baked_drawings)
+        finally:
+            for modifier in other_modifiers:
+                modifier.show_viewport = True
+            scene.frame_set(current_frame)
+
+        # The rig isn't needed anymore, the cache replaces it
+        if self.remove_rig:
+            matrix_world = target_gp.matrix_world.copy()
+            bpy.ops.lm_fs.delete()
+            target_gp.matrix_world = matrix_world
+
+        # What is left of the binding would deform the baked points again
+        disabled_modifiers = []
+        for modifier in target_gp.modifiers:
+            if modifier.name.startswith(prefix) and (modifier.show_viewport or modifier.show_render):
+                modifier.show_viewport = False
+                modifier.show_render = False
+                disabled_modifiers.append(modifier.name)
+        target_gp[POINT_CACHE_MODIFIERS_PROP] = disabled_modifiers
+        target_gp[POINT_CACHE_PROP] = cache_dir
+        apply_point_cache(target_gp, open_point_cache(cache_dir), current_frame)
+
+        message = f"Baked {baked_drawings} drawings in {time.perf_counter() - start_time:.2f}s"
+        log(message)
+        self.report({'INFO'}, message)
+
+        return {'FINISHED'}
\ No newline at end of file
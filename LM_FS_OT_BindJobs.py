@@ -0,0 +1,97 @@
+# LM LM_GPFollowShapes: Make Grease Pencil follow mesh animation
+# Copyright (C) 2025 Luca Malisan
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Bind all the targets of the job list to the source mesh in a single run
+
+import bpy
+import time
+from .LM_FS_FramePlan import plan_keyframes
+from .LM_FS_ControlPoints import create_simplified_gp, remove_simplified_gp
+from .LM_FS_MeshSnapshot import shared_snapshots
+from .LM_FS_Jobs import job_targets
+from .LM_FS_Profiler import profiled, phase, log, count
+
+class LM_FS_OT_BindJobs(bpy.types.Operator):
+    """Bind all the frames of every target in the job list"""
+    bl_idname = "lm_fs.bind_jobs"
+    bl_label = "Bind All Targets"
+    bl_description = "Bind all the frames of every enabled target of the job list to the source mesh. The source mesh is evaluated once per frame for all the targets"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        return context.scene.lm_fs_source_mesh is not None and len(context.scene.lm_fs_jobs) > 0
+
+    # main function
+    @profiled
+    def execute(self, context):
+        scene = context.scene
+        targets = job_targets(scene)
+        if not targets:
+            self.report({'WARNING'}, "No enabled target in the job list")
+            return {'CANCELLED'}
+
+        # Targets keyed at each frame, frames in timeline order
+        frame_targets = {}
+        total_points = 0
+        for target_gp in targets:
+            for frame_number, point_count in plan_keyframes(target_gp):
+                frame_targets.setdefault(frame_number, []).append(target_gp)
+                total_points += point_count
+        log("Binding", len(targets), "targets over", len(frame_targets), "frames,", total_points, "points")
+
+        original_target = scene.lm_fs_target_gp
+        original_frame = scene.frame_current
+        start_time = time.perf_counter()
+
+        # Simplify all the keyframes of each target once, as Bind All Frames does
+        simplified = {}
+        try:
+            if scene.lm_fs_bind_mode == 'RIG' and scene.lm_fs_control_selection == 'SIMPLIFY':
+                with phase("simplify"):
+                    for target_gp in targets:
+                        simplified[target_gp.name] = create_simplified_gp(context, target_gp).name
+
+            # Frame by frame, so the snapshot of the source mesh is built once for all the targets
+            with shared_snapshots():
+                for frame_number in sorted(frame_targets):
+                    scene.frame_set(frame_number)
+                    for target_gp in frame_targets[frame_number]:
+                        log("Binding", target_gp.name, "at frame", frame_number)
+                        scene.lm_fs_target_gp = target_gp
+                        bpy.ops.lm_fs.rigbind('INVOKE_DEFAULT', simplified_gp=simplified.get(target_gp.name, ""), skip_unchanged=True)
+                    count("frames")
+
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+
+            self.report({'ERROR'}, "Bind All Targets failed: " + str(e))
+            return {'CANCELLED'}
+
+        finally:
+            for simplified_name in simplified.values():
+                simplified_gp = bpy.data.objects.get(simplified_name)
+                if simplified_gp is not None:
+                    remove_simplified_gp(simplified_gp)
+            scene.lm_fs_target_gp = original_target
+            scene.frame_set(original_frame)
+
+        message = f"Bound {len(targets)} targets, {total_points} points in {time.perf_counter() - start_time:.2f}s"
+        log(message)
+        self.report({'INFO'}, message)
+
+        return {'FINISHED'}
\ No newline at end of file
@@ -0,0 +1,58 @@
+# LM LM_GPFollowShapes: Make Grease Pencil follow mesh animation
+# Copyright (C) 2025 Luca Malisan
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Stop playing the target grease pencil from its point cache
+
+import bpy
+from .LM_FS_PointCache import POINT_CACHE_PROP, POINT_CACHE_MODIFIERS_PROP, restore_rest_positions, release_point_cache
+from .LM_FS_Profiler import profiled, log
+
+class LM_FS_OT_ClearBake(bpy.types.Operator):
+    """Stop playing the target grease pencil from its point cache"""
+    bl_idname = "lm_fs.clear_bake"
+    bl_label = "Clear Bake"
+    bl_description = "Stop playing the target grease pencil from its point cache, restoring the drawings and the modifiers disabled by the bake. Cache files are kept on disk"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    # main function
+    @profiled
+    def execute(self, context):
+        target_gp = context.scene.lm_fs_target_gp
+        cache_dir = target_gp.get(POINT_CACHE_PROP) if target_gp else None
+        if not cache_dir:
+            self.report({'WARNING'}, "Target Grease Pencil has no point cache")
+            return {'CANCELLED'}
+
+        # Drawings go back to their shape before baking
+        try:
+            restore_rest_positions(target_gp, cache_dir)
+        except OSError as e:
+            self.report({'WARNING'}, "Unable to read point cache, drawings not restored: " + str(e))
+        release_point_cache(cache_dir)
+
+        for modifier_name in target_gp.get(POINT_CACHE_MODIFIERS_PROP, []):
+            modifier = target_gp.modifiers.get(modifier_name)
+            if modifier is not None:
+                modifier.show_viewport = True
+                modifier.show_render = True
+
+        del target_gp[POINT_CACHE_PROP]
+        if POINT_CACHE_MODIFIERS_PROP in target_gp:
+            del target_gp[POINT_CACHE_MODIFIERS_PROP]
+
+        log("Point cache cleared from", target_gp.name)
+
+        return {'FINISHED'}
\ No newline at end of file
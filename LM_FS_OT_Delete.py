@@ -1,92 +1,140 @@
-# LM LM_GPFollowShapes: Make Grease Pencil follow mesh animation
-# Copyright (C) 2025 Luca Malisan
-
-# This program is free software; you can redistribute it and/or modify
-# it under the terms of the GNU General Public License as published by
-# the Free Software Foundation; either version 3 of the License, or
-# (at your option) any later version.
-#
-# This program is distributed in the hope that it will be useful, but
-# WITHOUT ANY WARRANTY; without even the implied warranty of
-# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
-# General Public License for more details.
-#
-# You should have received a copy of the GNU General Public License
-# along with this program. If not, see <http://www.gnu.org/licenses/>.
-
-# Delete all FollowShapes bindings
-
-import bpy
-
-class LM_FS_OT_Delete(bpy.types.Operator):
-    """Delete all FollowShapes bindings from target and source objects"""
-    bl_idname = "lm_fs.delete"
-    bl_label = "Delete all FollowShapes bindings"
-    bl_description = "Delete all FollowShapes bindings from target and source objects"
-    bl_options = {'REGISTER', 'UNDO'}
-
-    # main function
-    def execute(self, context):
-        
-        try:
-            
-            target = context.scene.lm_fs_target_gp
-
-            if target and (target.type == 'GPENCIL' or target.type == 'GREASEPENCIL'):
-                #remove FollowShapes weights from target grease pencil object
-                            
-                print("Deleting FollowShapes weights from Grease Pencil", target.name)
-
-                # Get all vertex groups from gpencil object
-                vgroups = target.vertex_groups
-
-                # Ensure target has matching vertex groups
-                for vgroup in vgroups:
-                    if not vgroup.lock_weight and vgroup.name.startswith(context.scene.lm_fs_prefix):
-                        print("Deleting FollowShapes vertex group:", vgroup.name)
-                        
-                        for layer in target.data.layers:
-                            for frame in layer.frames:
-                                if hasattr(frame, 'drawing') and frame.drawing.attributes.get(vgroup.name):
-                                    # Remove the vertex group attribute from the drawing
-                                    frame.drawing.attributes.remove(frame.drawing.attributes[vgroup.name])
-
-                        target.vertex_groups.remove(vgroup)                        
-
-                print("All FollowShapes weights deleted from", target.name)
-
-                # Remove armature modifiers and corresponding rigs
-                for modifier in target.modifiers:
-                    if modifier.type == 'GREASE_PENCIL_ARMATURE' and modifier.object:
-                        rig = modifier.object
-                        if rig.name.startswith(context.scene.lm_fs_prefix):
-                            print("Removing FollowShapes armature modifier:", modifier.name)
-                            print("Deleting corresponding rig:", rig.name)
-                            
-                            # Remove parenting if target is parented to this rig
-                            if target.parent == rig:
-                                target.parent = None
-                                target.parent_type = 'OBJECT'
-                            
-                            # Get the collection containing the rig and delete all objects in it
-                            if rig.users_collection:
-                                for collection in rig.users_collection:
-                                    if collection.name.startswith(context.scene.lm_fs_prefix):
-                                        # Remove all objects from the collection
-                                        for obj in list(collection.objects):
-                                            bpy.data.objects.remove(obj, do_unlink=True)
-                                        # Remove the collection itself
-                                        bpy.data.collections.remove(collection)
-              
-                            # Finally, remove the modifier
-                            target.modifiers.remove(modifier)
-
-
-        except Exception as e:
-            import traceback
-            traceback.print_exc()
-
-            self.report({'WARNING'}, "Unable to delete bindings: " + str(e))
-            return {'CANCELLED'}
-
+# LM LM_GPFollowShapes: Make Grease Pencil follow mesh animation
+# Copyright (C) 2025 Luca Malisan
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Delete all FollowShapes bindings
+
+import bpy
+from .LM_FS_SurfaceBind import binding_attribute_names, vertex_attribute_names
+from .LM_FS_GeometryNodes import remove_surface_bind_modifier
+from .LM_FS_BindingData import control_attribute_names
+from .LM_FS_Profiler import profiled, log, count
+
+# Armature modifiers of Grease Pencil v3 and of the legacy Grease Pencil
+ARMATURE_MODIFIER_TYPES = {'GREASE_PENCIL_ARMATURE', 'GP_ARMATURE'}
+
+
+def remove_drawing_attributes(target, names):
+    """Remove the named attributes from every drawing of the target in a single pass.
+
+    Returns the number of attributes removed.
+    """
+    removed = 0
+    for layer in target.data.layers:
+        for frame in layer.frames:
+            if not hasattr(frame, 'drawing'):
+                continue
+            attributes = frame.drawing.attributes
+            # Collect first, removing invalidates the attributes being iterated
+            for attribute_name in [attribute.name for attribute in attributes if attribute.name in names]:
+                attributes.remove(attributes[attribute_name])
+                removed += 1
+    return removed
+
+
+def rig_datablocks(rig, prefix):
+    """Objects and collections to remove with a rig: the rig and its prefixed collections"""
+    objects = {rig}
+    collections = set()
+    for collection in rig.users_collection:
+        if collection.name.startswith(prefix):
+            collections.add(collection)
+            objects.update(collection.objects)
+    return objects, collections
+
+
+class LM_FS_OT_Delete(bpy.types.Operator):
+    """Delete all FollowShapes bindings from target and source objects"""
+    bl_idname = "lm_fs.delete"
+    bl_label = "Delete all FollowShapes bindings"
+    bl_description = "Delete all FollowShapes bindings from target and source objects"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    # main function
+    @profiled
+    def execute(self, context):
+        
+        try:
+            
+            target = context.scene.lm_fs_target_gp
+            prefix = context.scene.lm_fs_prefix
+
+            if target and (target.type == 'GPENCIL' or target.type == 'GREASEPENCIL'):
+                #remove FollowShapes weights from target grease pencil object
+                            
+                log("Deleting FollowShapes weights from Grease Pencil", target.name)
+
+                # FollowShapes vertex groups, their weights are drawing attributes with the same name
+                vgroups = [vgroup for vgroup in target.vertex_groups if not vgroup.lock_weight and vgroup.name.startswith(prefix)]
+                attribute_names = {vgroup.name for vgroup in vgroups}
+                # Surface and rig binding attributes go in the same pass
+                attribute_names.update(binding_attribute_names(prefix) + vertex_attribute_names(prefix) + control_attribute_names(prefix))
+                count("drawing_attributes_removed", remove_drawing_attributes(target, attribute_names))
+
+                for vgroup in vgroups:
+                    target.vertex_groups.remove(vgroup)
+                count("vertex_groups_removed", len(vgroups))
+
+                log("All FollowShapes weights deleted from", target.name)
+
+                source = context.scene.lm_fs_source_mesh
+
+                # Remove surface bindings
+                remove_surface_bind_modifier(target, prefix)
+
+                # Armature modifiers with FollowShapes rigs, and everything created with the rigs
+                modifiers = [modifier for modifier in target.modifiers
+                             if modifier.type in ARMATURE_MODIFIER_TYPES and modifier.object and modifier.object.name.startswith(prefix)]
+                rigs = {modifier.object for modifier in modifiers}
+                # Legacy binds parent the target to its rig
+                if target.parent and target.parent.type == 'ARMATURE' and target.parent.name.startswith(prefix):
+                    rigs.add(target.parent)
+
+                objects = set()
+                collections = set()
+                for rig in rigs:
+                    log("Deleting FollowShapes rig:", rig.name)
+                    rig_objects, rig_collections = rig_datablocks(rig, prefix)
+                    objects.update(rig_objects)
+                    collections.update(rig_collections)
+                # The bound objects stay, even when kept in a FollowShapes collection
+                objects.discard(target)
+                objects.discard(source)
+                armatures = {rig.data for rig in rigs}
+
+                for modifier in modifiers:
+                    log("Removing FollowShapes armature modifier:", modifier.name)
+                    target.modifiers.remove(modifier)
+
+                # Remove parenting if target is parented to a removed rig
+                if target.parent in rigs:
+                    target.parent = None
+                    target.parent_type = 'OBJECT'
+
+                # One removal of all the datablocks, then of the armatures left without users
+                bpy.data.batch_remove(list(objects) + list(collections))
+                bpy.data.batch_remove([armature for armature in armatures if armature.users == 0])
+                count("rigs_removed", len(rigs))
+                count("objects_removed", len(objects))
+
+
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+
+            self.report({'WARNING'}, "Unable to delete bindings: " + str(e))
+            return {'CANCELLED'}
+
         return {'FINISHED'}
\ No newline at end of file
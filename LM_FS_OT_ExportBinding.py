@@ -0,0 +1,62 @@
+# LM LM_GPFollowShapes: Make Grease Pencil follow mesh animation
+# Copyright (C) 2025 Luca Malisan
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Export the binding stored on the target grease pencil to a .npz file
+
+import bpy
+from bpy_extras.io_utils import ExportHelper
+from .LM_FS_MeshSnapshot import LM_FS_MeshSnapshot
+from .LM_FS_BindingData import export_binding
+from .LM_FS_Profiler import profiled, log
+
+class LM_FS_OT_ExportBinding(bpy.types.Operator, ExportHelper):
+    """Export the binding of the target grease pencil"""
+    bl_idname = "lm_fs.export_binding"
+    bl_label = "Export Binding"
+    bl_description = "Save the binding stored on the drawings of the target Grease Pencil to a .npz file, to apply it again on a shot using the same mesh"
+    bl_options = {'REGISTER'}
+
+    filename_ext = ".npz"
+    filter_glob: bpy.props.StringProperty(default="*.npz", options={'HIDDEN'})
+
+    @classmethod
+    def poll(cls, context):
+        target_gp = context.scene.lm_fs_target_gp
+        return target_gp is not None and target_gp.type == 'GREASEPENCIL' and context.scene.lm_fs_source_mesh is not None
+
+    # main function
+    @profiled
+    def execute(self, context):
+        scene = context.scene
+        target_gp = scene.lm_fs_target_gp
+
+        # The topology of the source mesh is saved with the binding
+        snapshot = LM_FS_MeshSnapshot(scene.lm_fs_source_mesh, context.evaluated_depsgraph_get())
+        try:
+            exported_drawings = export_binding(self.filepath, target_gp, scene.lm_fs_prefix, snapshot)
+        except OSError as e:
+            self.report({'ERROR'}, "Unable to write binding file: " + str(e))
+            return {'CANCELLED'}
+
+        if not exported_drawings:
+            self.report({'WARNING'}, "The target has no stored binding, bind it first")
+            return {'CANCELLED'}
+
+        message = f"Exported the binding of {exported_drawings} drawings to {self.filepath}"
+        log(message)
+        self.report({'INFO'}, message)
+
+        return {'FINISHED'}
\ No newline at end of file
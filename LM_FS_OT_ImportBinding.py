@@ -0,0 +1,85 @@
+# LM LM_GPFollowShapes: Make Grease Pencil follow mesh animation
+# Copyright (C) 2025 Luca Malisan
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Apply a binding exported to a .npz file to the target grease pencil
+
+import bpy
+from bpy_extras.io_utils import ImportHelper
+from .LM_FS_MeshSnapshot import LM_FS_MeshSnapshot
+from .LM_FS_GeometryNodes import install_surface_bind_modifier
+from .LM_FS_BindingData import import_binding
+from .LM_FS_RigBuilder import remove_frame_rig
+from .LM_FS_Profiler import profiled, log, count
+
+class LM_FS_OT_ImportBinding(bpy.types.Operator, ImportHelper):
+    """Apply an exported binding to the target grease pencil"""
+    bl_idname = "lm_fs.import_binding"
+    bl_label = "Import Binding"
+    bl_description = "Bind the target Grease Pencil with a binding exported from a shot using the same mesh, without searching the nearest faces again. Rigs are rebuilt in the imported frames"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    filename_ext = ".npz"
+    filter_glob: bpy.props.StringProperty(default="*.npz", options={'HIDDEN'})
+
+    @classmethod
+    def poll(cls, context):
+        target_gp = context.scene.lm_fs_target_gp
+        return target_gp is not None and target_gp.type == 'GREASEPENCIL' and context.scene.lm_fs_source_mesh is not None
+
+    # main function
+    @profiled
+    def execute(self, context):
+        scene = context.scene
+        target_gp = scene.lm_fs_target_gp
+        source_mesh = scene.lm_fs_source_mesh
+        prefix = scene.lm_fs_prefix
+
+        snapshot = LM_FS_MeshSnapshot(source_mesh, context.evaluated_depsgraph_get())
+        try:
+            frames, skipped = import_binding(self.filepath, target_gp, prefix, snapshot)
+        except (OSError, KeyError, ValueError) as e:
+            self.report({'ERROR'}, "Unable to import binding: " + str(e))
+            return {'CANCELLED'}
+
+        if skipped:
+            self.report({'WARNING'}, f"{skipped} drawings don't match the exported ones and were skipped")
+        if not frames['RIG'] and not frames['SURFACE']:
+            self.report({'ERROR'}, "No drawing of the target matches the binding file")
+            return {'CANCELLED'}
+
+        # Surface bindings play back as soon as the modifier is there
+        if frames['SURFACE']:
+            # A drawing follows either a rig or the mesh surface, not both
+            for frame_number in sorted(frames['SURFACE']):
+                remove_frame_rig(context, target_gp, frame_number)
+            install_surface_bind_modifier(target_gp, source_mesh, prefix)
+
+        # Rigs are rebuilt frame by frame from the imported controls
+        if frames['RIG']:
+            original_frame = scene.frame_current
+            try:
+                for frame_number in sorted(frames['RIG']):
+                    scene.frame_set(frame_number)
+                    bpy.ops.lm_fs.rigbind('INVOKE_DEFAULT', use_stored_binding=True)
+            finally:
+                scene.frame_set(original_frame)
+
+        count("frames_imported", len(frames['RIG'] | frames['SURFACE']))
+        message = f"Imported the binding of {len(frames['RIG'])} rig frames and {len(frames['SURFACE'])} surface frames"
+        log(message)
+        self.report({'INFO'}, message)
+
+        return {'FINISHED'}
\ No newline at end of file
@@ -0,0 +1,50 @@
+# LM LM_GPFollowShapes: Make Grease Pencil follow mesh animation
+# Copyright (C) 2025 Luca Malisan
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Add target grease pencils to the job list
+
+import bpy
+from .LM_FS_Jobs import is_grease_pencil
+
+class LM_FS_OT_JobAdd(bpy.types.Operator):
+    """Add the selected grease pencils, or the target, to the job list"""
+    bl_idname = "lm_fs.job_add"
+    bl_label = "Add Targets"
+    bl_description = "Add the selected Grease Pencil objects to the job list, or the target Grease Pencil when none is selected"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    # main function
+    def execute(self, context):
+        scene = context.scene
+        candidates = [obj for obj in context.selected_objects if is_grease_pencil(None, obj)]
+        if not candidates and scene.lm_fs_target_gp is not None:
+            candidates = [scene.lm_fs_target_gp]
+
+        listed = {job.target for job in scene.lm_fs_jobs}
+        added = 0
+        for obj in candidates:
+            if obj in listed:
+                continue
+            job = scene.lm_fs_jobs.add()
+            job.target = obj
+            added += 1
+
+        if not added:
+            self.report({'WARNING'}, "No new Grease Pencil to add")
+            return {'CANCELLED'}
+
+        scene.lm_fs_jobs_index = len(scene.lm_fs_jobs) - 1
+        return {'FINISHED'}
\ No newline at end of file
@@ -0,0 +1,37 @@
+# LM LM_GPFollowShapes: Make Grease Pencil follow mesh animation
+# Copyright (C) 2025 Luca Malisan
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Remove a target grease pencil from the job list
+
+import bpy
+
+class LM_FS_OT_JobRemove(bpy.types.Operator):
+    """Remove the active target from the job list"""
+    bl_idname = "lm_fs.job_remove"
+    bl_label = "Remove Target"
+    bl_description = "Remove the active target from the job list. Its bindings are kept"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        return 0 <= context.scene.lm_fs_jobs_index < len(context.scene.lm_fs_jobs)
+
+    # main function
+    def execute(self, context):
+        scene = context.scene
+        scene.lm_fs_jobs.remove(scene.lm_fs_jobs_index)
+        scene.lm_fs_jobs_index = min(scene.lm_fs_jobs_index, len(scene.lm_fs_jobs) - 1)
+        return {'FINISHED'}
\ No newline at end of file
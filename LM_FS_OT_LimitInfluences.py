@@ -0,0 +1,60 @@
+# LM LM_GPFollowShapes: Make Grease Pencil follow mesh animation
+# Copyright (C) 2025 Luca Malisan
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Limit the bone influences of each point of the target grease pencil
+
+import bpy
+from .LM_FS_FramePlan import plan_keyframes
+from .LM_FS_EnvelopeWeights import limit_influences
+from .LM_FS_RigBuilder import find_frame_rig
+from .LM_FS_Fingerprint import refresh_fingerprint
+from .LM_FS_Profiler import profiled, log, count
+
+class LM_FS_OT_LimitInfluences(bpy.types.Operator):
+    """Limit the bone influences of each point in all frames"""
+    bl_idname = "lm_fs.limit_influences"
+    bl_label = "Limit Influences (All Frames)"
+    bl_description = "Keep only the strongest FollowShapes weights of each point in all frames, normalize them and remove the vertex groups left empty"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    # main function
+    @profiled
+    def execute(self, context):
+        scene = context.scene
+        target_gp = scene.lm_fs_target_gp
+
+        if not target_gp or target_gp.type != 'GREASEPENCIL':
+            self.report({'ERROR'}, "Limiting influences requires a Grease Pencil target from Blender 4.3 or later")
+            return {'CANCELLED'}
+
+        removed_influences = 0
+        removed_groups = 0
+        for frame_number, _point_count in plan_keyframes(target_gp):
+            frame_influences, frame_groups = limit_influences(target_gp, frame_number, scene.lm_fs_prefix, scene.lm_fs_max_influences, scene.lm_fs_min_weight)
+            removed_influences += frame_influences
+            removed_groups += frame_groups
+            # Keep the rig on the next Bind All Frames, unless the limits are off and nothing was applied
+            rig, _bones = find_frame_rig(scene, target_gp, frame_number)
+            if rig is not None and (scene.lm_fs_max_influences > 0 or scene.lm_fs_min_weight > 0.0):
+                refresh_fingerprint(scene, rig, frame_number, envelope=False)
+        count("influences_removed", removed_influences)
+        count("vertex_groups_removed", removed_groups)
+
+        message = f"Removed {removed_influences} influences and {removed_groups} empty vertex groups"
+        log(message)
+        self.report({'INFO'}, message)
+
+        return {'FINISHED'}
\ No newline at end of file
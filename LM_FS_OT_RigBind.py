@@ -1,292 +1,395 @@
-# LM LM_GPFollowShapes: Make Grease Pencil follow mesh animation
-# Copyright (C) 2025 Luca Malisan
-
-# This program is free software; you can redistribute it and/or modify
-# it under the terms of the GNU General Public License as published by
-# the Free Software Foundation; either version 3 of the License, or
-# (at your option) any later version.
-#
-# This program is distributed in the hope that it will be useful, but
-# WITHOUT ANY WARRANTY; without even the implied warranty of
-# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
-# General Public License for more details.
-#
-# You should have received a copy of the GNU General Public License
-# along with this program. If not, see <http://www.gnu.org/licenses/>.
-
-# Create rig and bind grease pencil to mesh
-
-import bpy
-import mathutils
-import bmesh
-
-
-class LM_FS_OT_RigBind(bpy.types.Operator):
-    """Create rig and bind grease pencil to mesh in the current frame"""
-    bl_idname = "lm_fs.rigbind"
-    bl_label = "Bind Current Frame"
-    bl_description = "Create rig and bind grease pencil to mesh for the current frame"
-    bl_options = {'REGISTER', 'UNDO'}
-
-    LM_FS_RIG_SUFFIX = "_RIG"
-
-    # main function
-    def execute(self, context):
-
-        target_gp = context.scene.lm_fs_target_gp
-        source_mesh = context.scene.lm_fs_source_mesh
-
-        # Check if we are in Blender 4.3 or later
-        def is_GP3():
-            return hasattr(target_gp.data.layers[0].frames[0], 'drawing')
-        
-        current_frame = context.scene.frame_current
-
-        rig_name = context.scene.lm_fs_prefix + context.scene.lm_fs_target_gp.name + "_F" + str(current_frame) + self.LM_FS_RIG_SUFFIX
-
-        # Check if armature with rig_name already exists and delete it
-        if rig_name in bpy.data.objects:
-            existing_rig = bpy.data.objects[rig_name]
-            # Remove parenting if target_gp is parented to this rig
-            if target_gp.parent == existing_rig:
-                target_gp.parent = None
-                target_gp.parent_type = 'OBJECT'
-            bpy.data.objects.remove(existing_rig, do_unlink=True)
-            # Remove armature modifiers that reference the deleted rig
-            for modifier in target_gp.modifiers:                
-                if modifier.type == 'GREASE_PENCIL_ARMATURE' and modifier.object is None:                   
-                    target_gp.modifiers.remove(modifier)
-
-        # Create new armature
-        armature_data = bpy.data.armatures.new(rig_name)
-        armature_obj = bpy.data.objects.new(rig_name, armature_data)
-        armature_obj.data.display_type = 'ENVELOPE'
-
-        # Duplicate the target grease pencil object
-        new_gp = target_gp.copy()
-        new_gp.data = target_gp.data.copy()
-        context.collection.objects.link(new_gp)
-
-        # Add simplify modifier to the duplicated grease pencil
-        if is_GP3():
-            simplify_modifier = new_gp.modifiers.new(name="Simplify", type='GREASE_PENCIL_SIMPLIFY')
-        else:
-            simplify_modifier = new_gp.grease_pencil_modifiers.new(name="Simplify", type='GP_SIMPLIFY')
-        simplify_modifier.mode = 'ADAPTIVE'
-        simplify_modifier.factor = max(1.0, float(context.scene.lm_fs_simplify))/1000
-        
-        # Apply the simplify modifier
-        bpy.context.view_layer.objects.active = new_gp
-        if is_GP3():
-            bpy.ops.object.modifier_apply(modifier=simplify_modifier.name,all_keyframes=True)
-        else:
-            bpy.ops.object.modifier_apply(modifier=simplify_modifier.name)
-
-        # Create or get the empties collection
-        empties_collection_name = rig_name + "_CTRL"
-        if empties_collection_name not in bpy.data.collections:
-            empties_collection = bpy.data.collections.new(empties_collection_name)
-            context.scene.collection.children.link(empties_collection)
-        else:
-            empties_collection = bpy.data.collections[empties_collection_name]
-            # Clear all objects from the existing collection
-            for obj in empties_collection.objects[:]:
-                bpy.data.objects.remove(obj, do_unlink=True)
-        # Make sure the collection is visible and selectable
-        layer_collection = bpy.context.view_layer.layer_collection
-        for lc in layer_collection.children:
-            if lc.collection == empties_collection:
-                lc.hide_viewport = False
-                break
-        empties_collection.hide_render = False     
-
-        # Link the armature to the scene collection
-        context.collection.objects.link(armature_obj)
-        # Move armature to empties collection
-        if armature_obj.name in context.collection.objects:
-            context.collection.objects.unlink(armature_obj)
-        empties_collection.objects.link(armature_obj)
-        
-        bone_size = context.scene.lm_fs_expand
-        
-        # Get all keyframes from the grease pencil
-        gp_data = new_gp.data
-        
-        # Iterate through all layers
-        for layer_idx, layer in enumerate(gp_data.layers):
-            print("Processing layer:", layer.name if is_GP3() else layer.info)
-            # Iterate through all frames
-            for frame in layer.frames:                                
-                # compatibilty with 4.2/4.4
-                drawing = frame.drawing if is_GP3() else frame
-
-                frame_number = frame.frame_number
-
-                # skip frames that are not the current frame
-                if frame_number != current_frame: 
-                    continue                
-                # Set current frame (redundant, kept for loop compatibility)
-                context.scene.frame_set(frame_number)
-
-                print(" Processing frame:", frame.frame_number)
-                
-                # Count total points for progress tracking
-                total_points = 0
-                for layer_temp in gp_data.layers:
-                    for frame_temp in layer_temp.frames:
-                        if frame_temp.frame_number != current_frame: 
-                            continue
-                        drawing_temp = frame_temp.drawing if is_GP3() else frame_temp
-                        for stroke_temp in drawing_temp.strokes:
-                            total_points += len(stroke_temp.points)
-                
-                current_point = 0
-                
-                # Iterate through all strokes in this frame
-                for stroke_idx, stroke in enumerate(drawing.strokes):
-                    # Iterate through all points in this stroke
-                    for point_idx, point in enumerate(stroke.points):
-                        current_point += 1
-                        progress = (current_point / total_points) * 100
-                        # Only print progress when percentage has 1 unit increment
-                        new_progress_unit = int(progress)
-                        if not hasattr(self, '_last_progress_unit'):
-                            self._last_progress_unit = 0
-                        if new_progress_unit > self._last_progress_unit + 5:
-                            print(f"Creating and binding empties and bones: {new_progress_unit}% ({current_point}/{total_points})")
-                            self._last_progress_unit = new_progress_unit
-                        
-                        # compatibilty with 4.2/4.4
-                        point_co = point.position if is_GP3() else point.co
-
-                        # Get world position of the point
-                        world_pos = new_gp.matrix_world @ point_co
-                        
-                        # Create unique empty name
-                        empty_name = f"{context.scene.lm_fs_prefix}CTRL_{target_gp.name}_f{frame_number}_l{layer_idx}_s{stroke_idx}_p{point_idx}"
-
-                        # Create unique bone name
-                        bone_name = empty_name 
-                                             
-                        # Create empty object at point location
-                        bpy.ops.object.empty_add(type='SPHERE', location=world_pos)
-                        empty = bpy.context.object
-                        empty.name = empty_name
-                        empty.empty_display_size = bone_size
-                        # Move empty to empties collection
-                        if empty.name in context.collection.objects:
-                            context.collection.objects.unlink(empty)
-                        empties_collection.objects.link(empty)
-
-                        # Find nearest face on source mesh
-                        # Create bmesh from source mesh
-                        bm = bmesh.new()
-                        bm.from_mesh(source_mesh.data)
-                        bm.faces.ensure_lookup_table()
-                        
-                        # Find closest face to the world position
-                        closest_face = None
-                        min_distance =  context.scene.lm_fs_distance
-                        if min_distance == 0:
-                            min_distance = float('inf')
-
-                        for face in bm.faces:
-                            face_center = source_mesh.matrix_world @ face.calc_center_median()
-                            distance = (world_pos - face_center).length
-                            if distance < min_distance:
-                                min_distance = distance
-                                closest_face = face
-                        
-                        if closest_face:
-                            # Get the three vertices of the closest face
-                            face_verts = [v.co for v in closest_face.verts]
-                            face_vert_indices = [v.index for v in closest_face.verts]
-
-                            # Parent empty to source mesh with vertex (3 vertices) parenting
-                            bpy.ops.object.select_all(action='DESELECT')
-                            source_mesh.select_set(True)
-                            empty.select_set(True)
-                            bpy.context.view_layer.objects.active = source_mesh
-
-                            # Enter edit mode and select the three vertices
-                            bpy.ops.object.mode_set(mode='EDIT')
-                            bpy.ops.mesh.select_all(action='DESELECT')                            
-
-                            # Select the three vertices of the closest face
-                            for vert_idx in face_vert_indices:
-                                source_mesh.data.vertices[vert_idx].select = True
-
-                            # Back to edit mode and set parent
-                            bpy.ops.object.mode_set(mode='OBJECT')
-                            bpy.ops.object.parent_set(type='VERTEX_TRI')
-
-                            # Create bone
-                            # Enter edit mode for armature to add bones
-                            bpy.ops.object.mode_set(mode='OBJECT')
-                            bpy.context.view_layer.objects.active = armature_obj
-                            bpy.ops.object.mode_set(mode='EDIT')
-                            bone = armature_data.edit_bones.new(bone_name)
-                            bone.head = world_pos
-                            bone.tail = world_pos + mathutils.Vector((0, bone_size*0.1, 0 ))
-                            bone.envelope_distance = bone_size * 0.8
-                            bone.head_radius = bone_size * 0.2
-                            bone.tail_radius = bone.head_radius * 0.5
-
-                            # Add constraint to the bone
-                            # First, exit edit mode to access pose bones
-                            bpy.ops.object.mode_set(mode='OBJECT')
-                            bpy.ops.object.mode_set(mode='POSE')
-
-                            # Get the pose bone
-                            pose_bone = armature_obj.pose.bones[bone_name]
-
-                            # Add Copy Transforms constraint to follow the empty
-                            copy_transforms_constraint = pose_bone.constraints.new('COPY_TRANSFORMS')
-                            copy_transforms_constraint.name = f"CopyTransforms_{empty_name}"    
-                            copy_transforms_constraint.target = empty
-                            bpy.ops.object.mode_set(mode='OBJECT')
-
-                        else:
-                            # Delete the empty if no closest face found
-                            bpy.ops.object.select_all(action='DESELECT')
-                            empty.select_set(True)
-                            bpy.ops.object.delete()
-                        
-                        bm.free()
-
-        print("Rig and empties created successfully")
-
-        # Bind target_gp to armature with automatic weights
-        bpy.context.view_layer.objects.active = target_gp
-        bpy.ops.object.mode_set(mode='OBJECT')
-        
-        # Select both objects for parenting
-        bpy.ops.object.select_all(action='DESELECT')
-        target_gp.select_set(True)
-        armature_obj.select_set(True)
-        bpy.context.view_layer.objects.active = armature_obj
-        
-        # Parent with automatic weights
-        # bpy.ops.object.parent_set(type='ARMATURE_AUTO')
-        bpy.ops.object.parent_set(type='ARMATURE_ENVELOPE')
-        print("Grease Pencil bound to rig with envelope weights")      
-        
-        # Delete the duplicated grease pencil object
-        bpy.data.objects.remove(new_gp, do_unlink=True)
-
-        # Hide the collection
-        layer_collection = bpy.context.view_layer.layer_collection
-        for lc in layer_collection.children:
-            if lc.collection == empties_collection:
-                lc.hide_viewport = True
-                break
-        empties_collection.hide_render = True
-
-        # Select GP (for user convenience)
-        bpy.ops.object.select_all(action='DESELECT')
-        target_gp.select_set(True)
-        bpy.context.view_layer.objects.active = target_gp
-
-        print("Bind for frame " + str(current_frame) + " completed successfully")
-
+# LM LM_GPFollowShapes: Make Grease Pencil follow mesh animation
+# Copyright (C) 2025 Luca Malisan
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Create rig and bind grease pencil to mesh
+
+import bpy
+from .LM_FS_MeshSnapshot import frame_snapshot, matrix_to_numpy, transform_points
+from .LM_FS_DrawingData import read_positions
+from .LM_FS_SurfaceBind import compute_surface_binding, write_surface_binding, write_surface_vertices, clear_surface_binding
+from .LM_FS_GeometryNodes import install_surface_bind_modifier
+from .LM_FS_EnvelopeWeights import apply_envelope_weights, add_armature_modifier, limit_scene_influences
+from .LM_FS_RigBuilder import RIG_SUFFIX, LM_FS_Control, create_control_empties, create_control_bones, remove_shared_frame_bones, remove_frame_rig, frame_rig_name, shared_rig_name, frame_bone_collection_name, set_collection_hidden
+from .LM_FS_ControlPoints import create_simplified_gp, remove_simplified_gp, cluster_control_points, merge_controls
+from .LM_FS_BindingData import write_control_binding, read_control_table, restore_controls, clear_control_binding
+from .LM_FS_Fingerprint import frame_fingerprint, stored_fingerprint, store_fingerprint
+from .LM_FS_Profiler import LM_FS_PhaseTimer, profiled, log, count
+
+
+class LM_FS_OT_RigBind(bpy.types.Operator):
+    """Create rig and bind grease pencil to mesh in the current frame"""
+    bl_idname = "lm_fs.rigbind"
+    bl_label = "Bind Current Frame"
+    bl_description = "Create rig and bind grease pencil to mesh for the current frame"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    LM_FS_RIG_SUFFIX = RIG_SUFFIX
+
+    simplified_gp: bpy.props.StringProperty(
+        name="Simplified Grease Pencil",
+        description="Already simplified copy of the target, shared by several frames. Created and removed by the bind when empty",
+        default="",
+        options={'HIDDEN', 'SKIP_SAVE'}
+    )
+    skip_unchanged: bpy.props.BoolProperty(
+        name="Skip Unchanged",
+        description="Keep the existing rig when drawing, mesh and settings are the same as when it was built",
+        default=False,
+        options={'HIDDEN', 'SKIP_SAVE'}
+    )
+    use_stored_binding: bpy.props.BoolProperty(
+        name="Use Stored Binding",
+        description="Rebuild the rig from the binding stored on the drawings (or imported) instead of searching the nearest faces",
+        default=False,
+        options={'HIDDEN', 'SKIP_SAVE'}
+    )
+
+    # main function
+    @profiled
+    def execute(self, context):
+
+        target_gp = context.scene.lm_fs_target_gp
+        source_mesh = context.scene.lm_fs_source_mesh
+        timer = LM_FS_PhaseTimer()
+
+        # Check if we are in Blender 4.3 or later
+        def is_GP3():
+            return hasattr(target_gp.data.layers[0].frames[0], 'drawing')
+        
+        if self.use_stored_binding and not is_GP3():
+            self.report({'ERROR'}, "Stored bindings require Blender 4.3 or later")
+            return {'CANCELLED'}
+
+        # A stored binding is always rebuilt as a rig
+        if context.scene.lm_fs_bind_mode == 'SURFACE' and not self.use_stored_binding:
+            if not is_GP3():
+                self.report({'ERROR'}, "Surface binding requires Blender 4.3 or later")
+                return {'CANCELLED'}
+            return self.execute_surface(context, target_gp, source_mesh, timer)
+
+        current_frame = context.scene.frame_current
+
+        # The shared rig relies on the per drawing weights of Blender 4.3+
+        shared_rig = context.scene.lm_fs_rig_layout == 'SHARED'
+        if shared_rig and not is_GP3():
+            self.report({'ERROR'}, "Shared rig requires Blender 4.3 or later")
+            return {'CANCELLED'}
+
+        frame_rig = frame_rig_name(context.scene, target_gp, current_frame)
+        rig_name = shared_rig_name(context.scene, target_gp) if shared_rig else frame_rig
+        bone_collection_name = frame_bone_collection_name(current_frame)
+
+        # Snapshot the evaluated source mesh once, shared by all the points of this frame
+        snapshot = frame_snapshot(source_mesh, context.evaluated_depsgraph_get(), current_frame)
+        timer.lap("snapshot")
+
+        # Empties and triangle vertex groups use the vertex indices on the mesh data
+        if not snapshot.deforms_only:
+            self.report({'ERROR'}, "The modifiers of the source mesh add or remove vertices: apply them or use the Surface bind mode")
+            return {'CANCELLED'}
+
+        # Controls of the stored binding, read before the teardown clears it
+        stored_controls = None
+        if self.use_stored_binding:
+            stored_controls = read_control_table(target_gp, current_frame, context.scene.lm_fs_prefix)
+            if stored_controls is None:
+                self.report({'ERROR'}, "No stored binding in frame " + str(current_frame))
+                return {'CANCELLED'}
+
+        # Skip the frame if its rig was built from the very same inputs
+        fingerprint = frame_fingerprint(context.scene, target_gp, snapshot, current_frame)
+        if self.skip_unchanged and rig_name in bpy.data.objects:
+            existing_rig = bpy.data.objects[rig_name]
+            frame_rigged = not shared_rig or existing_rig.data.collections.get(bone_collection_name) is not None
+            if frame_rigged and stored_fingerprint(existing_rig, current_frame) == fingerprint and any(modifier.type == 'GREASE_PENCIL_ARMATURE' and modifier.object == existing_rig for modifier in target_gp.modifiers):
+                log("Frame " + str(current_frame) + " unchanged, keeping rig", rig_name)
+                count("frames_unchanged")
+                timer.lap("fingerprint")
+                return {'FINISHED'}
+        timer.lap("fingerprint")
+
+        # Check if armature of this frame already exists and delete it
+        if frame_rig in bpy.data.objects:
+            existing_rig = bpy.data.objects[frame_rig]
+            # Remove parenting if target_gp is parented to this rig
+            if target_gp.parent == existing_rig:
+                target_gp.parent = None
+                target_gp.parent_type = 'OBJECT'
+            bpy.data.objects.remove(existing_rig, do_unlink=True)
+            # Remove armature modifiers that reference the deleted rig
+            for modifier in target_gp.modifiers:                
+                if modifier.type == 'GREASE_PENCIL_ARMATURE' and modifier.object is None:                   
+                    target_gp.modifiers.remove(modifier)
+            # The empties of the per frame rig are not reused by the shared rig
+            if shared_rig and frame_rig + "_CTRL" in bpy.data.collections:
+                stale_collection = bpy.data.collections[frame_rig + "_CTRL"]
+                for obj in stale_collection.objects[:]:
+                    bpy.data.objects.remove(obj, do_unlink=True)
+                bpy.data.collections.remove(stale_collection)
+
+        # Remove the bones of this frame from the shared rig
+        remove_shared_frame_bones(context, target_gp, current_frame)
+
+        # A drawing follows either a rig or the mesh surface, not both
+        if is_GP3():
+            for layer in target_gp.data.layers:
+                for frame in layer.frames:
+                    if frame.frame_number == current_frame:
+                        clear_surface_binding(frame.drawing, context.scene.lm_fs_prefix)
+                        clear_control_binding(frame.drawing, context.scene.lm_fs_prefix)
+        timer.lap("teardown")
+
+        # Create new armature, or add this frame to the shared one
+        new_rig = rig_name not in bpy.data.objects
+        if new_rig:
+            armature_data = bpy.data.armatures.new(rig_name)
+            armature_obj = bpy.data.objects.new(rig_name, armature_data)
+            armature_obj.data.display_type = 'ENVELOPE'
+        else:
+            armature_obj = bpy.data.objects[rig_name]
+
+        # Control points picked by spacing are read from the target, no copy is needed
+        use_clustering = context.scene.lm_fs_control_selection == 'CLUSTER' and is_GP3()
+
+        # Use the simplified copy shared by the caller, or make one for this bind
+        owns_simplified_gp = not use_clustering and stored_controls is None and self.simplified_gp not in bpy.data.objects
+        if use_clustering or stored_controls is not None:
+            new_gp = None
+        elif owns_simplified_gp:
+            new_gp = create_simplified_gp(context, target_gp)
+        else:
+            new_gp = bpy.data.objects[self.simplified_gp]
+        timer.lap("simplify")
+
+        # Create or get the empties collection
+        empties_collection_name = rig_name + "_CTRL"
+        if empties_collection_name not in bpy.data.collections:
+            empties_collection = bpy.data.collections.new(empties_collection_name)
+            context.scene.collection.children.link(empties_collection)
+        elif new_rig:
+            empties_collection = bpy.data.collections[empties_collection_name]
+            # Clear all objects from the existing collection
+            for obj in empties_collection.objects[:]:
+                bpy.data.objects.remove(obj, do_unlink=True)
+        else:
+            # The shared rig keeps the empties of the other frames
+            empties_collection = bpy.data.collections[empties_collection_name]
+        # Make sure the collection is visible and selectable
+        set_collection_hidden(context, empties_collection, False)
+
+        if new_rig:
+            # Link the armature to the scene collection
+            context.collection.objects.link(armature_obj)
+            # Move armature to empties collection
+            if armature_obj.name in context.collection.objects:
+                context.collection.objects.unlink(armature_obj)
+            empties_collection.objects.link(armature_obj)
+        timer.lap("setup")
+        
+        bone_size = context.scene.lm_fs_expand
+        
+        # Max distance is used as search radius (0 = no limit)
+        search_radius = context.scene.lm_fs_distance
+
+        # Controls of this frame, created in bulk once all the points are collected
+        controls = []
+
+        if stored_controls is not None:
+            # Controls go back where the stored binding puts them on the mesh, no search is needed
+            controls = restore_controls(snapshot, stored_controls, f"{context.scene.lm_fs_prefix}CTRL_{target_gp.name}_f{current_frame}_c")
+            log("Restoring stored controls:", len(controls))
+            count("controls_restored", len(controls))
+            control_points = ()
+        elif use_clustering:
+            log("Picking control points with spacing", context.scene.lm_fs_spacing)
+            control_points = cluster_control_points(target_gp, current_frame, context.scene.lm_fs_spacing)
+        else:
+            control_points = self.iter_simplified_points(context, new_gp, current_frame)
+
+        processed_points = 0
+        for layer_idx, stroke_idx, point_idx, world_pos in control_points:
+            processed_points += 1
+
+            # Find nearest triangle on source mesh
+            closest_triangle = snapshot.find_nearest(world_pos, search_radius)
+            if closest_triangle is None:
+                continue
+
+            # Create unique control name (used for both empty and bone)
+            control_name = f"{context.scene.lm_fs_prefix}CTRL_{target_gp.name}_f{current_frame}_l{layer_idx}_s{stroke_idx}_p{point_idx}"
+
+            controls.append(LM_FS_Control(control_name, world_pos, closest_triangle, snapshot.triangles[closest_triangle].tolist()))
+        count("points_processed", processed_points)
+        count("nearest_face_searches", processed_points)
+        timer.lap("nearest_face")
+
+        # Controls that would move alike share a single empty and bone
+        merge_mode = context.scene.lm_fs_merge_controls
+        if merge_mode != 'NONE' and stored_controls is None:
+            merged_controls = merge_controls(controls, context.scene.lm_fs_merge_tolerance if merge_mode == 'TOLERANCE' else 0.0)
+            log("Merged controls:", len(controls), "->", len(merged_controls))
+            count("controls_merged", len(controls) - len(merged_controls))
+            controls = merged_controls
+        timer.lap("merge")
+
+        # Create all the empties of the frame, parented to their triangles
+        log("Creating and binding empties:", len(controls))
+        empties = create_control_empties(context, empties_collection, controls, source_mesh, bone_size)
+        count("empties_created", len(empties))
+        timer.lap("empties")
+
+        # Create all the bones of the frame in a single edit session
+        log("Creating bones:", len(controls))
+        bone_names = create_control_bones(context, armature_obj, controls, empties, bone_size)
+        frame_bones = [armature_obj.data.bones[bone_name] for bone_name in bone_names]
+        count("bones_created", len(frame_bones))
+
+        # Index the bones of the frame in the shared rig
+        if shared_rig:
+            bone_collection = armature_obj.data.collections.new(bone_collection_name)
+            for bone in frame_bones:
+                bone_collection.assign(bone)
+        store_fingerprint(armature_obj, current_frame, fingerprint)
+        timer.lap("bones")
+
+        log("Rig created successfully")
+
+        if is_GP3():
+            # Write envelope weights directly to the drawings, then only add the armature modifier
+            weighted_bones = apply_envelope_weights(target_gp, armature_obj, current_frame, frame_bones)
+            add_armature_modifier(target_gp, armature_obj)
+            log("Grease Pencil bound to rig with envelope weights:", weighted_bones, "bones")
+            count("bones_weighted", weighted_bones)
+            removed_influences, removed_groups = limit_scene_influences(context.scene, target_gp, current_frame)
+            count("influences_removed", removed_influences)
+            count("vertex_groups_removed", removed_groups)
+        else:
+            # Bind target_gp to armature with automatic weights
+            bpy.context.view_layer.objects.active = target_gp
+            bpy.ops.object.mode_set(mode='OBJECT')
+            
+            # Select both objects for parenting
+            bpy.ops.object.select_all(action='DESELECT')
+            target_gp.select_set(True)
+            armature_obj.select_set(True)
+            bpy.context.view_layer.objects.active = armature_obj
+            
+            # Parent with automatic weights
+            # bpy.ops.object.parent_set(type='ARMATURE_AUTO')
+            bpy.ops.object.parent_set(type='ARMATURE_ENVELOPE')
+            log("Grease Pencil bound to rig with envelope weights")      
+        timer.lap("envelope")
+
+        # Keep the binding on the drawings, to export it or rebuild the rig without searching
+        if is_GP3():
+            count("binding_points_stored", write_control_binding(target_gp, current_frame, context.scene.lm_fs_prefix, snapshot, controls))
+        timer.lap("binding_data")
+        
+        # Delete the duplicated grease pencil object
+        if owns_simplified_gp:
+            remove_simplified_gp(new_gp)
+
+        # Hide the collection
+        set_collection_hidden(context, empties_collection, True)
+
+        # Select GP (for user convenience)
+        bpy.ops.object.select_all(action='DESELECT')
+        target_gp.select_set(True)
+        bpy.context.view_layer.objects.active = target_gp
+        timer.lap("cleanup")
+
+        log("Bind for frame " + str(current_frame) + " completed successfully")
+
+        return {'FINISHED'}
+
+    def iter_simplified_points(self, context, new_gp, current_frame):
+        """Points of the simplified copy keyed at the current frame, as (layer_idx, stroke_idx, point_idx, world_position)"""
+
+        # Check if we are in Blender 4.3 or later
+        def is_GP3():
+            return hasattr(new_gp.data.layers[0].frames[0], 'drawing')
+
+        # Iterate through all layers
+        for layer_idx, layer in enumerate(new_gp.data.layers):
+            log("Processing layer:", layer.name if is_GP3() else layer.info)
+            # Iterate through all frames
+            for frame in layer.frames:                                
+                # compatibilty with 4.2/4.4
+                drawing = frame.drawing if is_GP3() else frame
+
+                # skip frames that are not the current frame
+                if frame.frame_number != current_frame: 
+                    continue                
+
+                log(" Processing frame:", frame.frame_number)
+                
+                # Iterate through all strokes in this frame
+                for stroke_idx, stroke in enumerate(drawing.strokes):
+                    # Iterate through all points in this stroke
+                    for point_idx, point in enumerate(stroke.points):
+                        # compatibilty with 4.2/4.4
+                        point_co = point.position if is_GP3() else point.co
+
+                        # Get world position of the point
+                        yield layer_idx, stroke_idx, point_idx, new_gp.matrix_world @ point_co
+
+    def execute_surface(self, context, target_gp, source_mesh, timer):
+        """Bind the drawings of the current frame to the source mesh surface, without any rig.
+
+        The binding is evaluated by a single Geometry Nodes modifier on the
+        target, the drawings themselves are left as drawn.
+        """
+        current_frame = context.scene.frame_current
+        prefix = context.scene.lm_fs_prefix
+
+        # Snapshot the evaluated source mesh once, shared by all the drawings of this frame
+        snapshot = frame_snapshot(source_mesh, context.evaluated_depsgraph_get(), current_frame)
+        gp_to_world = matrix_to_numpy(target_gp.matrix_world)
+        timer.lap("snapshot")
+
+        # A drawing follows either a rig or the mesh surface, not both
+        remove_frame_rig(context, target_gp, current_frame)
+        timer.lap("teardown")
+
+        bound_points = 0
+        for layer in target_gp.data.layers:
+            log("Processing layer:", layer.name)
+            for frame in layer.frames:
+                # skip frames that are not the current frame
+                if frame.frame_number != current_frame:
+                    continue
+                positions = read_positions(frame.drawing)
+                if positions is None:
+                    continue
+
+                # Points farther than max distance are left unbound
+                triangles, barycentrics, offsets = compute_surface_binding(snapshot, transform_points(gp_to_world, positions), context.scene.lm_fs_distance)
+                write_surface_binding(frame.drawing, prefix, triangles, barycentrics, offsets)
+                clear_control_binding(frame.drawing, prefix)
+                write_surface_vertices(frame.drawing, prefix, snapshot, triangles)
+                bound_points += int((triangles >= 0).sum())
+                count("points_processed", len(positions))
+                count("nearest_face_searches", len(positions))
+        count("points_bound", bound_points)
+        timer.lap("surface_binding")
+
+        # The modifier evaluates the binding of all the frames
+        install_surface_bind_modifier(target_gp, source_mesh, prefix)
+        timer.lap("cleanup")
+
+        log("Surface bind for frame " + str(current_frame) + " completed successfully:", bound_points, "points bound")
+
         return {'FINISHED'}
\ No newline at end of file
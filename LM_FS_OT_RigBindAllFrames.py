@@ -1,46 +1,321 @@
-# LM LM_GPFollowShapes: Make Grease Pencil follow mesh animation
-# Copyright (C) 2025 Luca Malisan
-
-# This program is free software; you can redistribute it and/or modify
-# it under the terms of the GNU General Public License as published by
-# the Free Software Foundation; either version 3 of the License, or
-# (at your option) any later version.
-#
-# This program is distributed in the hope that it will be useful, but
-# WITHOUT ANY WARRANTY; without even the implied warranty of
-# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
-# General Public License for more details.
-#
-# You should have received a copy of the GNU General Public License
-# along with this program. If not, see <http://www.gnu.org/licenses/>.
-
-# Create rig and bind all frames
-
-import bpy
-
-class LM_FS_OT_RigBindAllFrames(bpy.types.Operator):
-    """Create rig and bind grease pencil to mesh in the current frame"""
-    bl_idname = "lm_fs.rigbind_all_frames"
-    bl_label = "Bind All Frames"
-    bl_description = "Create rig and bind grease pencil to mesh for all frames"
-    bl_options = {'REGISTER', 'UNDO'}
-
-
-    # main function
-    def execute(self, context):
-
-        target_gp = context.scene.lm_fs_target_gp
-        
-        # Check if we are in Blender 4.3 or later
-        def is_GP3():
-            return hasattr(target_gp.data.layers[0].frames[0], 'drawing')
-        
-        # Iterate through all frames in all layers
-        for layer in target_gp.data.layers:
-            for frame in layer.frames:
-                context.scene.frame_set(frame.frame_number)
-                
-                # Call the existing rigbind operator for each frame
-                bpy.ops.lm_fs.rigbind('INVOKE_DEFAULT')
-
-        return {'FINISHED'}
\ No newline at end of file
+# LM LM_GPFollowShapes: Make Grease Pencil follow mesh animation
+# Copyright (C) 2025 Luca Malisan
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Create rig and bind all frames
+
+import bpy
+import time
+from .LM_FS_FramePlan import plan_keyframes, describe_plan
+from .LM_FS_ControlPoints import create_simplified_gp, remove_simplified_gp
+from .LM_FS_SurfaceBind import binding_attribute_names, clear_surface_binding
+from .LM_FS_RigBuilder import find_frame_rig, frame_rig_name, remove_frame_rig
+from .LM_FS_BindingData import save_frame_binding, restore_frame_binding, read_control_table
+from .LM_FS_Fingerprint import stored_fingerprint
+from .LM_FS_Profiler import phase, begin_run, end_run, log, count
+
+class LM_FS_OT_RigBindAllFrames(bpy.types.Operator):
+    """Create rig and bind grease pencil to mesh in the current frame"""
+    bl_idname = "lm_fs.rigbind_all_frames"
+    bl_label = "Bind All Frames"
+    bl_description = "Create rig and bind grease pencil to mesh for all frames. Press Esc to cancel"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    # Seconds of binding per timer tick, at least one frame is bound per tick
+    LM_FS_TIME_BUDGET = 0.1
+
+    _timer = None
+
+    # main function
+    def execute(self, context):
+        # Blocking run, used from scripts and background mode
+        self.start(context)
+        try:
+            while self.frame_index < len(self.plan):
+                self.bind_next_frame(context)
+        except Exception:
+            self.rollback(context)
+            raise
+        self.finish(context)
+        return {'FINISHED'}
+
+    def invoke(self, context, event):
+        # Interactive run, a few frames per timer tick so the UI stays responsive
+        self.start(context)
+        wm = context.window_manager
+        wm.progress_begin(0, max(1, self.total_points))
+        self._timer = wm.event_timer_add(0.01, window=context.window)
+        wm.modal_handler_add(self)
+        self.update_progress(context)
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            self.stop(context)
+            lost_frames = self.rollback(context)
+            message = "Bind All Frames cancelled, frames bound before the run restored"
+            if lost_frames:
+                message += ". Frames " + ", ".join(str(frame_number) for frame_number in lost_frames) + " lost their rig and have to be bound again"
+            self.report({'WARNING'}, message)
+            return {'CANCELLED'}
+
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+
+        try:
+            tick_start = time.perf_counter()
+            while self.frame_index < len(self.plan) and time.perf_counter() - tick_start < self.LM_FS_TIME_BUDGET:
+                self.bind_next_frame(context)
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            self.stop(context)
+            self.rollback(context)
+            self.report({'ERROR'}, "Bind All Frames failed: " + str(e))
+            return {'CANCELLED'}
+
+        self.update_progress(context)
+        if self.frame_index < len(self.plan):
+            return {'RUNNING_MODAL'}
+
+        self.stop(context)
+        self.finish(context)
+        return {'FINISHED'}
+
+    def cancel(self, context):
+        # Blender ends the modal run itself, e.g. when the window closes or another file is loaded
+        self.stop(context)
+        end_run(context, self.run, 'CANCELLED')
+
+    def start(self, context):
+        """Plan the keyframes and remember what exists before binding, for rollback"""
+        scene = context.scene
+        target_gp = scene.lm_fs_target_gp
+        self.target_gp = target_gp
+
+        # Each keyframe number is processed once, in timeline order
+        self.plan = plan_keyframes(target_gp)
+        log("Bind plan:", describe_plan(self.plan, detailed=True))
+        self.report({'INFO'}, "Binding " + describe_plan(self.plan))
+
+        self.frame_index = 0
+        self.started_frames = []
+        self.saved_frames = {}
+        self.done_points = 0
+        self.total_points = sum(point_count for _frame_number, point_count in self.plan)
+        self.original_frame = scene.frame_current
+        self.start_time = time.perf_counter()
+
+        # Frames already bound get their binding back on rollback, the new ones are undone
+        surface_tri_name = binding_attribute_names(scene.lm_fs_prefix)[0]
+        self.existing = {
+            "rigged_frames": {frame_number for frame_number, _point_count in self.plan if find_frame_rig(scene, target_gp, frame_number)[0] is not None},
+            "surface_frames": {frame.frame_number for layer in target_gp.data.layers for frame in layer.frames
+                               if hasattr(frame, 'drawing') and frame.drawing.attributes.get(surface_tri_name) is not None},
+            "objects": set(bpy.data.objects.keys()),
+            "collections": set(bpy.data.collections.keys()),
+            "armatures": set(bpy.data.armatures.keys()),
+            "node_groups": set(bpy.data.node_groups.keys()),
+            "vertex_groups": set(target_gp.vertex_groups.keys()),
+            "modifiers": set(target_gp.modifiers.keys()),
+            "parent": (target_gp.parent.name if target_gp.parent else None, target_gp.parent_type, target_gp.matrix_parent_inverse.copy()),
+        }
+
+        # The frame binds run nested in this one and add their phases and counters to it
+        self.run = begin_run(context, self.bl_idname)
+
+        # Simplify all the keyframes once, every frame bind shares the copy
+        self.simplified_gp = None
+        if scene.lm_fs_bind_mode == 'RIG' and scene.lm_fs_control_selection == 'SIMPLIFY':
+            try:
+                with phase("simplify"):
+                    self.simplified_gp = create_simplified_gp(context, target_gp)
+            except Exception:
+                end_run(context, self.run, 'CANCELLED')
+                raise
+            self.existing["objects"].discard(self.simplified_gp.name)
+
+    def bind_next_frame(self, context):
+        frame_number, point_count = self.plan[self.frame_index]
+        log("Binding frame", frame_number, "-", point_count, "points")
+        context.scene.frame_set(frame_number)
+        self.started_frames.append(frame_number)
+
+        # Keep what the frame was bound with, so rollback can bring it back
+        if frame_number in self.existing["rigged_frames"] or frame_number in self.existing["surface_frames"]:
+            self.saved_frames[frame_number] = self.save_frame(context, frame_number)
+
+        # Call the existing rigbind operator for each frame, frames that didn't change are skipped
+        bpy.ops.lm_fs.rigbind('INVOKE_DEFAULT', simplified_gp=self.simplified_gp.name if self.simplified_gp else "", skip_unchanged=True)
+
+        self.frame_index += 1
+        self.done_points += point_count
+        count("frames")
+
+    def save_frame(self, context, frame_number):
+        """Binding of a frame bound before the run, with the rig built from it"""
+        scene = context.scene
+        target_gp = self.target_gp
+
+        # Check if we are in Blender 4.3 or later
+        def is_GP3():
+            return hasattr(target_gp.data.layers[0].frames[0], 'drawing')
+
+        rig, _bones = find_frame_rig(scene, target_gp, frame_number)
+        saved = {
+            "binding": save_frame_binding(target_gp, frame_number, scene.lm_fs_prefix) if is_GP3() else None,
+            "rig": rig.name if rig is not None else None,
+            "fingerprint": stored_fingerprint(rig, frame_number) if rig is not None else None,
+        }
+        if rig is not None:
+            saved["layout"] = 'PER_FRAME' if rig.name == frame_rig_name(scene, target_gp, frame_number) else 'SHARED'
+        return saved
+
+    def rebuild_frame(self, context, frame_number, layout):
+        """Rebuild the rig of a frame from its stored binding, in the given rig layout.
+
+        Returns False when the frame has no stored binding or the bind fails.
+        """
+        scene = context.scene
+        if read_control_table(self.target_gp, frame_number, scene.lm_fs_prefix) is None:
+            return False
+        run_layout = scene.lm_fs_rig_layout
+        scene.lm_fs_rig_layout = layout
+        scene.frame_set(frame_number)
+        try:
+            result = bpy.ops.lm_fs.rigbind('INVOKE_DEFAULT', use_stored_binding=True)
+        except Exception:
+            import traceback
+            traceback.print_exc()
+            return False
+        finally:
+            scene.lm_fs_rig_layout = run_layout
+        return 'FINISHED' in result
+
+    def update_progress(self, context):
+        wm = context.window_manager
+        wm.progress_update(self.done_points)
+        wm.lm_fs_progress = self.done_points / max(1, self.total_points)
+        wm.lm_fs_progress_text = f"Binding frame {self.frame_index}/{len(self.plan)}"
+        for area in context.screen.areas:
+            if area.type == 'VIEW_3D':
+                area.tag_redraw()
+
+    def stop(self, context):
+        """End the modal run: timer, progress and the shared simplified copy"""
+        wm = context.window_manager
+        wm.event_timer_remove(self._timer)
+        wm.progress_end()
+        wm.lm_fs_progress = 0.0
+        wm.lm_fs_progress_text = ""
+        if context.screen is not None:
+            for area in context.screen.areas:
+                if area.type == 'VIEW_3D':
+                    area.tag_redraw()
+
+    def finish(self, context):
+        if self.simplified_gp is not None:
+            remove_simplified_gp(self.simplified_gp)
+            self.simplified_gp = None
+
+        elapsed = time.perf_counter() - self.start_time
+        points_per_second = self.done_points / elapsed if elapsed > 0 else 0.0
+        message = f"Bound {len(self.plan)} frames, {self.done_points} points in {elapsed:.2f}s ({points_per_second:.0f} points/s)"
+        log(message)
+        run = end_run(context, self.run)
+        self.report({'INFO'}, message + (" | " + run.summary() if run else ""))
+
+    def rollback(self, context):
+        """Undo the binding of the frames bound during the run.
+
+        Only datablocks named with the prefix and created during the run are
+        removed. Frames bound before the run get their binding attributes
+        back, and when the run replaced their rig it is rebuilt from the
+        stored binding, in its previous layout and with the envelope
+        distance of the run. Returns the frames whose rig can't be rebuilt,
+        because they had no stored binding.
+        """
+        scene = context.scene
+        target_gp = self.target_gp
+        existing = self.existing
+        prefix = scene.lm_fs_prefix
+
+        def created(datablocks, existing_names):
+            return [datablock for datablock in datablocks if datablock.name.startswith(prefix) and datablock.name not in existing_names]
+
+        if self.simplified_gp is not None:
+            remove_simplified_gp(self.simplified_gp)
+            self.simplified_gp = None
+
+        # Rigs the run built or replaced, a rig kept as unchanged stays. The frame being bound when it failed is always undone
+        interrupted_frames = self.started_frames[self.frame_index:]
+        restored_frames = []
+        for frame_number in self.started_frames:
+            saved = self.saved_frames.get(frame_number)
+            rig, _bones = find_frame_rig(scene, target_gp, frame_number)
+            if saved is not None and saved["rig"] is not None and frame_number not in interrupted_frames:
+                if rig is not None and rig.name == saved["rig"] and stored_fingerprint(rig, frame_number) == saved["fingerprint"]:
+                    continue
+            # Rigs created by the run go with the other new datablocks
+            if rig is not None and rig.name in existing["objects"]:
+                remove_frame_rig(context, target_gp, frame_number)
+            if saved is not None:
+                restored_frames.append(frame_number)
+
+        # Modifiers and vertex groups added to the target, with their drawing weights
+        for modifier in created(target_gp.modifiers, existing["modifiers"]):
+            target_gp.modifiers.remove(modifier)
+        for vgroup in created(target_gp.vertex_groups, existing["vertex_groups"]):
+            for layer in target_gp.data.layers:
+                for frame in layer.frames:
+                    if hasattr(frame, 'drawing') and frame.drawing.attributes.get(vgroup.name):
+                        frame.drawing.attributes.remove(frame.drawing.attributes[vgroup.name])
+            target_gp.vertex_groups.remove(vgroup)
+
+        # Surface bindings written by the frames bound so far, including an interrupted one
+        if scene.lm_fs_bind_mode == 'SURFACE':
+            for layer in target_gp.data.layers:
+                for frame in layer.frames:
+                    if frame.frame_number in self.started_frames and frame.frame_number not in existing["surface_frames"]:
+                        clear_surface_binding(frame.drawing, prefix)
+
+        # Previous parenting, unless the previous parent was a rig replaced by the run
+        parent_name, parent_type, parent_inverse = existing["parent"]
+        target_gp.parent = bpy.data.objects.get(parent_name) if parent_name else None
+        if target_gp.parent is not None:
+            target_gp.parent_type = parent_type
+            target_gp.matrix_parent_inverse = parent_inverse
+
+        # New rigs, empties, collections and node groups
+        bpy.data.batch_remove(created(bpy.data.objects, existing["objects"]))
+        bpy.data.batch_remove(created(bpy.data.collections, existing["collections"]))
+        bpy.data.batch_remove([armature for armature in created(bpy.data.armatures, existing["armatures"]) if armature.users == 0])
+        bpy.data.batch_remove([node_group for node_group in created(bpy.data.node_groups, existing["node_groups"]) if node_group.users == 0])
+
+        # Frames bound before the run get their binding back, and their rig rebuilt from it
+        lost_frames = []
+        for frame_number in restored_frames:
+            saved = self.saved_frames[frame_number]
+            if saved["binding"] is not None:
+                restore_frame_binding(target_gp, frame_number, prefix, saved["binding"])
+            if saved["rig"] is not None and (saved["binding"] is None or not self.rebuild_frame(context, frame_number, saved["layout"])):
+                lost_frames.append(frame_number)
+
+        scene.frame_set(self.original_frame)
+        log("Bind All Frames rolled back after", self.frame_index, "frames")
+        if lost_frames:
+            log("Frames left without a rig:", lost_frames)
+        end_run(context, self.run, 'CANCELLED')
+        return lost_frames
\ No newline at end of file
@@ -1,103 +1,266 @@
-# LM LM_GPFollowShapes: Make Grease Pencil follow mesh animation
-# Copyright (C) 2025 Luca Malisan
-
-# This program is free software; you can redistribute it and/or modify
-# it under the terms of the GNU General Public License as published by
-# the Free Software Foundation; either version 3 of the License, or
-# (at your option) any later version.
-#
-# This program is distributed in the hope that it will be useful, but
-# WITHOUT ANY WARRANTY; without even the implied warranty of
-# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
-# General Public License for more details.
-#
-# You should have received a copy of the GNU General Public License
-# along with this program. If not, see <http://www.gnu.org/licenses/>.
-
-# N panel menu in object mode
-
-import bpy
-
-class LM_FS_PT_ObjectMode_Panel(bpy.types.Panel):
-    bl_idname = "LM_FS_PT_ObjectMode_Panel"
-    bl_label = "GP Follow Shapes"
-    bl_category = "Grease Pencil"
-    bl_space_type = "VIEW_3D"
-    bl_region_type = "UI"
-
-    bpy.types.Scene.lm_fs_prefix = bpy.props.StringProperty(
-        name="Prefix",
-        default="LM_FS_",
-        description="Prefix for FollowShapes vertex groups and bones"
-    )
-
-    bpy.types.Scene.lm_fs_source_mesh = bpy.props.PointerProperty(
-        type=bpy.types.Object,
-        name="Source Mesh",
-        description="Source mesh object to conform to"
-    )
-
-    bpy.types.Scene.lm_fs_target_gp = bpy.props.PointerProperty(
-        type=bpy.types.Object,
-        name="Target Grease Pencil",
-        description="Target grease pencil object to drive"
-    )
-    bpy.types.Scene.lm_fs_distance = bpy.props.FloatProperty(
-        name="Max distance",
-        description="Maximum distance for binding. Points farther than this distance from the mesh will not be bound. Set to 0.0 to disable distance check.",
-        default=0,
-        min=0.0,
-        soft_max=10.0,
-        unit='LENGTH'
-    )
-    bpy.types.Scene.lm_fs_simplify = bpy.props.IntProperty(
-        name="Simplify",
-        description="Reduce number of points per stroke for rigging (higher value: more simplification. 1 = minimal simplification, recommended 3-7)",
-        min=1,
-        soft_max=10,
-        default=5
-    )
-    bpy.types.Scene.lm_fs_expand = bpy.props.FloatProperty(
-        name="Envelope distance",
-        description="Bone influence distance (higher value: more smoothing and expansion of weights)",
-        min=0.001,
-        soft_max=10,
-        default=0.25,
-        unit='LENGTH'
-    )
-    
-
-    @classmethod
-    def poll(cls, context):
-        return (context.mode == 'OBJECT')
-    
-    def draw(self, context):    
-        layout = self.layout
-
-        # mesh input box
-        layout.label(text="Source mesh:")
-        layout.prop_search(context.scene, "lm_fs_source_mesh", bpy.data, "objects", text="")
-
-        # grease pencil input box
-        layout.label(text="Target Grease Pencil:")
-        layout.prop_search(context.scene, "lm_fs_target_gp", bpy.data, "objects", text="")
-
-        # delete button        
-        layout.operator("lm_fs.delete")
-
-        # transfer button
-        layout.label(text= "Rigging options")
-        layout.prop(context.scene, "lm_fs_distance")
-        layout.prop(context.scene, "lm_fs_simplify") 
-        layout.prop(context.scene, "lm_fs_expand")
-
-        layout.label(text= "Create rig and bind GP target to it")
-        layout.operator("lm_fs.rigbind")
-        layout.operator("lm_fs.rigbind_all_frames")
-
-        layout.label(text="Fine tune envelope distance")
-        layout.operator("lm_fs.change_distance")
-        layout.operator("lm_fs.change_distance_all_frames")
-
-        layout.label(text="Add shrinkwrap&smoothing for better results")
-        layout.operator("lm_fs.add_shrinkwrap")
+# LM LM_GPFollowShapes: Make Grease Pencil follow mesh animation
+# Copyright (C) 2025 Luca Malisan
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# N panel menu in object mode
+
+import bpy
+from .LM_FS_OT_ChangeDistance import update_envelope_distance
+
+
+def lm_fs_expand_update(self, context):
+    # Live update of the current frame rig while the envelope distance changes
+    target_gp = self.lm_fs_target_gp
+    if self.lm_fs_live_expand and target_gp and target_gp.type == 'GREASEPENCIL':
+        update_envelope_distance(self, self.frame_current)
+
+class LM_FS_PT_ObjectMode_Panel(bpy.types.Panel):
+    bl_idname = "LM_FS_PT_ObjectMode_Panel"
+    bl_label = "GP Follow Shapes"
+    bl_category = "Grease Pencil"
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+
+    bpy.types.Scene.lm_fs_prefix = bpy.props.StringProperty(
+        name="Prefix",
+        default="LM_FS_",
+        description="Prefix for FollowShapes vertex groups and bones"
+    )
+
+    bpy.types.Scene.lm_fs_source_mesh = bpy.props.PointerProperty(
+        type=bpy.types.Object,
+        name="Source Mesh",
+        description="Source mesh object to conform to"
+    )
+
+    bpy.types.Scene.lm_fs_target_gp = bpy.props.PointerProperty(
+        type=bpy.types.Object,
+        name="Target Grease Pencil",
+        description="Target grease pencil object to drive"
+    )
+    bpy.types.Scene.lm_fs_bind_mode = bpy.props.EnumProperty(
+        name="Bind mode",
+        description="How the Grease Pencil follows the mesh",
+        items=[
+            ('RIG', "Rig", "Create empties, bones and an armature modifier for each bound frame"),
+            ('SURFACE', "Surface", "Store the nearest triangle of each point, a single Geometry Nodes modifier rebuilds point positions from the mesh at each frame. No rig is created"),
+        ],
+        default='RIG'
+    )
+    bpy.types.Scene.lm_fs_rig_layout = bpy.props.EnumProperty(
+        name="Rig layout",
+        description="How the rigs of the bound frames are organized",
+        items=[
+            ('PER_FRAME', "Per frame", "One armature, empties collection and armature modifier for each bound frame"),
+            ('SHARED', "Shared", "A single armature and armature modifier for the target, with a bone collection for each bound frame"),
+        ],
+        default='PER_FRAME'
+    )
+    bpy.types.Scene.lm_fs_distance = bpy.props.FloatProperty(
+        name="Max distance",
+        description="Maximum distance for binding. Points farther than this distance from the mesh will not be bound. Set to 0.0 to disable distance check.",
+        default=0,
+        min=0.0,
+        soft_max=10.0,
+        unit='LENGTH'
+    )
+    bpy.types.Scene.lm_fs_control_selection = bpy.props.EnumProperty(
+        name="Control points",
+        description="How the drawing points that become rig controls are chosen",
+        items=[
+            ('SIMPLIFY', "Simplify", "Simplify a copy of the drawing with the adaptive Simplify modifier"),
+            ('CLUSTER', "Spacing", "Keep one point for each cell of a grid of the given spacing, without copying the drawing"),
+        ],
+        default='SIMPLIFY'
+    )
+    bpy.types.Scene.lm_fs_spacing = bpy.props.FloatProperty(
+        name="Spacing",
+        description="Distance between rig controls. Each cell of a grid of this size gets at most one control",
+        default=0.05,
+        min=0.0001,
+        soft_max=1.0,
+        unit='LENGTH'
+    )
+    bpy.types.Scene.lm_fs_merge_controls = bpy.props.EnumProperty(
+        name="Merge controls",
+        description="Merge the rig controls that would move alike into a single empty and bone",
+        items=[
+            ('NONE', "Off", "One control per control point"),
+            ('TRIANGLE', "Same triangle", "One control for all the control points nearest to the same triangle of the mesh"),
+            ('TOLERANCE', "Tolerance", "One control for all the control points in each cell of a grid of the given tolerance"),
+        ],
+        default='NONE'
+    )
+    bpy.types.Scene.lm_fs_merge_tolerance = bpy.props.FloatProperty(
+        name="Merge tolerance",
+        description="Size of the grid cells whose control points are merged into one control",
+        default=0.02,
+        min=0.0001,
+        soft_max=1.0,
+        unit='LENGTH'
+    )
+    bpy.types.Scene.lm_fs_simplify = bpy.props.IntProperty(
+        name="Simplify",
+        description="Reduce number of points per stroke for rigging (higher value: more simplification. 1 = minimal simplification, recommended 3-7)",
+        min=1,
+        soft_max=10,
+        default=5
+    )
+    bpy.types.Scene.lm_fs_expand = bpy.props.FloatProperty(
+        name="Envelope distance",
+        description="Bone influence distance (higher value: more smoothing and expansion of weights)",
+        min=0.001,
+        soft_max=10,
+        default=0.25,
+        unit='LENGTH',
+        update=lm_fs_expand_update
+    )
+    bpy.types.Scene.lm_fs_live_expand = bpy.props.BoolProperty(
+        name="Live update",
+        description="Update the rig of the current frame while changing the envelope distance",
+        default=False
+    )
+    bpy.types.Scene.lm_fs_max_influences = bpy.props.IntProperty(
+        name="Max influences",
+        description="Maximum number of bones deforming each point, only the strongest are kept (0 = no limit)",
+        min=0,
+        soft_max=8,
+        default=0
+    )
+    bpy.types.Scene.lm_fs_min_weight = bpy.props.FloatProperty(
+        name="Min weight",
+        description="Weights below this value are removed, except the strongest one of each point",
+        min=0.0,
+        max=1.0,
+        default=0.0
+    )
+    bpy.types.Scene.lm_fs_cache_dir = bpy.props.StringProperty(
+        name="Cache directory",
+        description="Directory of the baked point caches, one subdirectory per Grease Pencil",
+        default="//lm_fs_cache/",
+        subtype='DIR_PATH'
+    )
+    bpy.types.Scene.lm_fs_verbose = bpy.props.BoolProperty(
+        name="Console log",
+        description="Print the progress messages of the operators to the system console, and write the run logs even without a log directory",
+        default=False
+    )
+    bpy.types.Scene.lm_fs_profile = bpy.props.BoolProperty(
+        name="cProfile",
+        description="Capture a Python profile of each operator run, saved as a .prof file next to its log",
+        default=False
+    )
+    bpy.types.Scene.lm_fs_log_dir = bpy.props.StringProperty(
+        name="Log directory",
+        description="Directory of the JSON logs of the operator runs. When empty, logs are only written with Console log or cProfile on, to the system temporary directory",
+        default="",
+        subtype='DIR_PATH'
+    )
+    # Summary of the last operator run, not saved with the file
+    bpy.types.WindowManager.lm_fs_last_run = bpy.props.StringProperty(
+        name="Last run",
+        default=""
+    )
+    # Progress of a running Bind All Frames, not saved with the file
+    bpy.types.WindowManager.lm_fs_progress = bpy.props.FloatProperty(
+        name="Progress",
+        min=0.0,
+        max=1.0,
+        default=0.0
+    )
+    bpy.types.WindowManager.lm_fs_progress_text = bpy.props.StringProperty(
+        name="Progress text",
+        default=""
+    )
+    
+
+    @classmethod
+    def poll(cls, context):
+        return (context.mode == 'OBJECT')
+    
+    def draw(self, context):    
+        layout = self.layout
+
+        # mesh input box
+        layout.label(text="Source mesh:")
+        layout.prop_search(context.scene, "lm_fs_source_mesh", bpy.data, "objects", text="")
+
+        # grease pencil input box
+        layout.label(text="Target Grease Pencil:")
+        layout.prop_search(context.scene, "lm_fs_target_gp", bpy.data, "objects", text="")
+
+        # delete button        
+        layout.operator("lm_fs.delete")
+
+        # transfer button
+        layout.label(text= "Rigging options")
+        layout.prop(context.scene, "lm_fs_bind_mode")
+        if context.scene.lm_fs_bind_mode == 'RIG':
+            layout.prop(context.scene, "lm_fs_rig_layout")
+        layout.prop(context.scene, "lm_fs_distance")
+        layout.prop(context.scene, "lm_fs_control_selection")
+        if context.scene.lm_fs_control_selection == 'CLUSTER':
+            layout.prop(context.scene, "lm_fs_spacing")
+        else:
+            layout.prop(context.scene, "lm_fs_simplify") 
+        if context.scene.lm_fs_bind_mode == 'RIG':
+            layout.prop(context.scene, "lm_fs_merge_controls")
+            if context.scene.lm_fs_merge_controls == 'TOLERANCE':
+                layout.prop(context.scene, "lm_fs_merge_tolerance")
+        layout.prop(context.scene, "lm_fs_expand")
+
+        layout.label(text= "Create rig and bind GP target to it")
+        layout.operator("lm_fs.rigbind")
+        layout.operator("lm_fs.rigbind_all_frames")
+        if context.window_manager.lm_fs_progress_text:
+            layout.progress(factor=context.window_manager.lm_fs_progress, type='BAR', text=context.window_manager.lm_fs_progress_text + " (Esc to cancel)")
+
+        layout.label(text="Bind several targets to the source mesh")
+        layout.template_list("LM_FS_UL_jobs", "", context.scene, "lm_fs_jobs", context.scene, "lm_fs_jobs_index", rows=3)
+        row = layout.row(align=True)
+        row.operator("lm_fs.job_add", icon='ADD')
+        row.operator("lm_fs.job_remove", icon='REMOVE')
+        layout.operator("lm_fs.bind_jobs")
+
+        layout.label(text="Fine tune envelope distance")
+        layout.prop(context.scene, "lm_fs_live_expand")
+        layout.operator("lm_fs.change_distance")
+        layout.operator("lm_fs.change_distance_all_frames")
+
+        layout.label(text="Limit bone influences per point")
+        row = layout.row(align=True)
+        row.prop(context.scene, "lm_fs_max_influences")
+        row.prop(context.scene, "lm_fs_min_weight")
+        layout.operator("lm_fs.limit_influences")
+
+        layout.label(text="Add shrinkwrap&smoothing for better results")
+        layout.operator("lm_fs.add_shrinkwrap")
+
+        layout.label(text="Reuse the binding in another shot")
+        row = layout.row(align=True)
+        row.operator("lm_fs.export_binding", icon='EXPORT')
+        row.operator("lm_fs.import_binding", icon='IMPORT')
+
+        layout.label(text="Bake to point cache")
+        layout.prop(context.scene, "lm_fs_cache_dir", text="")
+        layout.operator("lm_fs.bake")
+        layout.operator("lm_fs.clear_bake")
+
+        layout.label(text="Diagnostics")
+        layout.prop(context.scene, "lm_fs_verbose")
+        layout.prop(context.scene, "lm_fs_profile")
+        layout.prop(context.scene, "lm_fs_log_dir", text="")
+        if context.window_manager.lm_fs_last_run:
+            layout.label(text=context.window_manager.lm_fs_last_run)
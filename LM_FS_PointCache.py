@@ -0,0 +1,274 @@
+# LM LM_GPFollowShapes: Make Grease Pencil follow mesh animation
+# Copyright (C) 2025 Luca Malisan
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Baked point cache: deformed positions of each drawing stored in memory-mapped .npy files
+
+import os
+import json
+import bpy
+import numpy as np
+from bpy.app.handlers import persistent
+from .LM_FS_DrawingData import read_positions, write_positions, drawing_point_count, frame_at
+from .LM_FS_Profiler import log
+
+# Custom property on the target GP with the directory of its point cache
+POINT_CACHE_PROP = "lm_fs_point_cache"
+# Custom property on the target GP with the modifiers disabled by the bake
+POINT_CACHE_MODIFIERS_PROP = "lm_fs_point_cache_modifiers"
+
+INDEX_FILE = "index.json"
+
+# Point caches opened by the playback handler, by directory
+_open_caches = {}
+
+
+def cache_directory(cache_dir):
+    """Absolute path of a cache directory, which can be relative to the .blend file"""
+    return os.path.normpath(bpy.path.abspath(cache_dir))
+
+
+def drawing_file_name(layer_idx, keyframe):
+    return f"L{layer_idx}_K{keyframe}.npy"
+
+
+def rest_file_name(layer_idx, keyframe):
+    return f"L{layer_idx}_K{keyframe}_rest.npy"
+
+
+class LM_FS_PointCache:
+    """A baked point cache opened for playback.
+
+    Each drawing has a (frames, points, 3) float32 array of object space
+    positions, one row per frame where the drawing is shown, memory
+    mapped so only the rows being played are read from disk.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, INDEX_FILE)) as f:
+            self.index = json.load(f)
+        self.frame_start = self.index["frame_start"]
+        self.frame_end = self.index["frame_end"]
+        self.entries = {(entry["layer"], entry["keyframe"]): entry for entry in self.index["drawings"]}
+        self.arrays = {}
+
+    def positions(self, layer_idx, keyframe, frame_number):
+        """Baked positions of a drawing at frame_number, None if it wasn't baked"""
+        entry = self.entries.get((layer_idx, keyframe))
+        if entry is None:
+            return None
+        array = self.arrays.get(entry["file"])
+        if array is None:
+            array = np.load(os.path.join(self.directory, entry["file"]), mmap_mode='r')
+            self.arrays[entry["file"]] = array
+        row = min(max(frame_number - entry["frame_start"], 0), len(array) - 1)
+        return array[row]
+
+    def rest_positions(self, layer_idx, keyframe):
+        """Positions of a drawing before baking, None if it wasn't baked"""
+        entry = self.entries.get((layer_idx, keyframe))
+        if entry is None:
+            return None
+        return np.load(os.path.join(self.directory, entry["rest_file"]))
+
+
+def open_point_cache(cache_dir):
+    """Point cache of a directory, opened once and kept for the next frames"""
+    directory = cache_directory(cache_dir)
+    cache = _open_caches.get(directory)
+    if cache is None:
+        cache = LM_FS_PointCache(directory)
+        _open_caches[directory] = cache
+    return cache
+
+
+def release_point_cache(cache_dir):
+    """Forget an opened point cache, closing its memory maps so its files can be rewritten"""
+    _open_caches.pop(cache_directory(cache_dir), None)
+
+
+def plan_bake(target_gp, frame_start, frame_end):
+    """Frames where each drawing is shown in the frame range.
+
+    Returns {(layer_idx, keyframe): [frame_number, ...]}.
+    """
+    plan = {}
+    for layer_idx, layer in enumerate(target_gp.data.layers):
+        for frame_number in range(frame_start, frame_end + 1):
+            frame = frame_at(layer, frame_number)
+            if frame is not None:
+                plan.setdefault((layer_idx, frame.frame_number), []).append(frame_number)
+    return plan
+
+
+def bake_point_cache(context, target_gp, cache_dir, frame_start, frame_end):
+    """Evaluate the deformed target on each frame of the range and write its point cache.
+
+    Returns the number of baked drawings. Drawings whose evaluated point
+    count differs from the original (e.g. a Simplify modifier) can't be
+    played back from positions and are skipped.
+    """
+    release_point_cache(cache_dir)
+    directory = cache_directory(cache_dir)
+    os.makedirs(directory, exist_ok=True)
+
+    plan = plan_bake(target_gp, frame_start, frame_end)
+    layers = target_gp.data.layers
+    arrays = {}
+    first_frames = {}
+    entries = []
+    for (layer_idx, keyframe), frame_numbers in plan.items():
+        drawing = next(frame.drawing for frame in layers[layer_idx].frames if frame.frame_number == keyframe)
+        point_count = drawing_point_count(drawing)
+        if point_count == 0:
+            continue
+        entry = {
+            "layer": layer_idx,
+            "layer_name": layers[layer_idx].name,
+            "keyframe": keyframe,
+            "frame_start": frame_numbers[0],
+            "frame_end": frame_numbers[-1],
+            "points": point_count,
+            "file": drawing_file_name(layer_idx, keyframe),
+            "rest_file": rest_file_name(layer_idx, keyframe),
+        }
+        # The drawings are as drawn here: bindings only deform the evaluated copy, and a previous bake was cleared
+        np.save(os.path.join(directory, entry["rest_file"]), read_positions(drawing))
+        first_frames[(layer_idx, keyframe)] = frame_numbers[0]
+        arrays[(layer_idx, keyframe)] = np.lib.format.open_memmap(os.path.join(directory, entry["file"]), mode='w+', dtype=np.float32, shape=(len(frame_numbers), point_count, 3))
+        entries.append(entry)
+
+    skipped = set()
+    for frame_number in range(frame_start, frame_end + 1):
+        context.scene.frame_set(frame_number)
+        evaluated_gp = target_gp.evaluated_get(context.evaluated_depsgraph_get())
+        for layer_idx, layer in enumerate(evaluated_gp.data.layers):
+            frame = frame_at(layers[layer_idx], frame_number)
+            if frame is None or (layer_idx, frame.frame_number) not in arrays:
+                continue
+            evaluated_frame = layer.current_frame()
+            positions = read_positions(evaluated_frame.drawing) if evaluated_frame is not None else None
+            array = arrays[(layer_idx, frame.frame_number)]
+            if positions is None or len(positions) != array.shape[1]:
+                skipped.add((layer_idx, frame.frame_number))
+                continue
+            array[frame_number - first_frames[(layer_idx, frame.frame_number)]] = positions
+
+    # Close the memory maps, drop the drawings that couldn't be baked
+    for array in arrays.values():
+        array.flush()
+    arrays.clear()
+    for entry in [entry for entry in entries if (entry["layer"], entry["keyframe"]) in skipped]:
+        log("Drawing", entry["layer_name"], "keyframe", entry["keyframe"], "changes point count when evaluated, not baked")
+        os.remove(os.path.join(directory, entry["file"]))
+        os.remove(os.path.join(directory, entry["rest_file"]))
+        entries.remove(entry)
+
+    with open(os.path.join(directory, INDEX_FILE), "w") as f:
+        json.dump({"object": target_gp.name, "frame_start": frame_start, "frame_end": frame_end, "drawings": entries}, f, indent=1)
+    return len(entries)
+
+
+def apply_point_cache(target_gp, cache, frame_number):
+    """Write the baked positions of frame_number to the drawings of the target"""
+    frame_number = min(max(frame_number, cache.frame_start), cache.frame_end)
+    for layer_idx, layer in enumerate(target_gp.data.layers):
+        frame = frame_at(layer, frame_number)
+        if frame is None:
+            continue
+        positions = cache.positions(layer_idx, frame.frame_number, frame_number)
+        if positions is None or len(positions) != drawing_point_count(frame.drawing):
+            continue
+        write_positions(frame.drawing, positions)
+
+
+def restore_rest_positions(target_gp, cache_dir):
+    """Put back the positions the drawings had before baking"""
+    cache = open_point_cache(cache_dir)
+    for layer_idx, layer in enumerate(target_gp.data.layers):
+        for frame in layer.frames:
+            positions = cache.rest_positions(layer_idx, frame.frame_number)
+            if positions is not None and len(positions) == drawing_point_count(frame.drawing):
+                write_positions(frame.drawing, positions)
+
+
+def played_objects():
+    """Grease Pencil objects playing back from a point cache"""
+    return [obj for obj in bpy.data.objects if obj.type == 'GREASEPENCIL' and obj.get(POINT_CACHE_PROP)]
+
+
+@persistent
+def lm_fs_point_cache_handler(scene, depsgraph):
+    """Play baked drawings back from their point cache on frame change"""
+    for obj in scene.objects:
+        if obj.type != 'GREASEPENCIL':
+            continue
+        cache_dir = obj.get(POINT_CACHE_PROP)
+        if not cache_dir:
+            continue
+        # A missing, truncated or foreign cache leaves the drawings as they are
+        try:
+            cache = open_point_cache(cache_dir)
+            apply_point_cache(obj, cache, scene.frame_current)
+        except (OSError, ValueError, KeyError):
+            continue
+
+
+@persistent
+def lm_fs_point_cache_save_pre(*_args):
+    """Save the drawings as drawn, not in the shape of the frame being played"""
+    for obj in played_objects():
+        try:
+            restore_rest_positions(obj, obj[POINT_CACHE_PROP])
+        except (OSError, ValueError, KeyError):
+            continue
+
+
+@persistent
+def lm_fs_point_cache_play_current(*_args):
+    """Play the current frame back again, once the file is saved or loaded"""
+    scene = bpy.context.scene
+    if scene is None:
+        return
+    for obj in played_objects():
+        try:
+            apply_point_cache(obj, open_point_cache(obj[POINT_CACHE_PROP]), scene.frame_current)
+        except (OSError, ValueError, KeyError):
+            continue
+
+
+# Handlers of the point cache playback, by handler list
+HANDLERS = (
+    ("frame_change_post", lm_fs_point_cache_handler),
+    ("save_pre", lm_fs_point_cache_save_pre),
+    ("save_post", lm_fs_point_cache_play_current),
+    ("load_post", lm_fs_point_cache_play_current),
+)
+
+
+def register():
+    for handler_list, handler in HANDLERS:
+        handlers = getattr(bpy.app.handlers, handler_list)
+        if handler not in handlers:
+            handlers.append(handler)
+
+
+def unregister():
+    for handler_list, handler in HANDLERS:
+        handlers = getattr(bpy.app.handlers, handler_list)
+        if handler in handlers:
+            handlers.remove(handler)
+    _open_caches.clear()
@@ -0,0 +1,233 @@
+# LM LM_GPFollowShapes: Make Grease Pencil follow mesh animation
+# Copyright (C) 2025 Luca Malisan
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Instrumentation shared by the operators: phase timers, counters, log messages,
+# optional cProfile capture and a JSON log file for each run
+
+import os
+import json
+import time
+import tempfile
+import functools
+import cProfile
+from contextlib import contextmanager
+import bpy
+from bpy.app.handlers import persistent
+
+# Seconds spent in each phase since profiling was enabled, for the benchmarks
+_phase_times = {}
+_enabled = False
+
+# Run of the operator being instrumented, None between runs
+_run = None
+
+
+def enable_profiling(enabled=True):
+    """Start (or stop) collecting phase timings across runs, clearing the previous ones"""
+    global _enabled
+    _enabled = enabled
+    _phase_times.clear()
+
+
+def profiling_enabled():
+    return _enabled
+
+
+def phase_times():
+    """Seconds spent in each phase, in the order phases were first met"""
+    return dict(_phase_times)
+
+
+class LM_FS_Run:
+    """Timings, counters and messages of one operator run"""
+
+    def __init__(self, name, verbose=False, use_cprofile=False):
+        self.name = name
+        self.verbose = verbose
+        self.started = time.time()
+        self.start = time.perf_counter()
+        self.seconds = 0.0
+        self.phases = {}
+        self.counters = {}
+        self.messages = []
+        self.status = None
+        self.log_file = None
+        self.profile_file = None
+        self.profile = cProfile.Profile() if use_cprofile else None
+        if self.profile is not None:
+            self.profile.enable()
+
+    def summary(self):
+        """One line summary: total time, slowest phases and counters"""
+        parts = [f"{self.seconds:.2f}s"]
+        slowest = sorted(self.phases.items(), key=lambda item: item[1], reverse=True)[:4]
+        if slowest:
+            parts.append(", ".join(f"{name} {seconds:.2f}s" for name, seconds in slowest))
+        if self.counters:
+            parts.append(", ".join(f"{value} {name.replace('_', ' ')}" for name, value in self.counters.items()))
+        return " | ".join(parts)
+
+    def finish(self, log_dir, status):
+        """Stop the clock and write the log file (and the cProfile stats) to log_dir, unless it is None"""
+        self.seconds = time.perf_counter() - self.start
+        self.status = status
+        if self.profile is not None:
+            self.profile.disable()
+        if log_dir is None:
+            return
+        os.makedirs(log_dir, exist_ok=True)
+        base_name = time.strftime("%Y%m%d_%H%M%S", time.localtime(self.started)) + "_" + self.name.replace(".", "_")
+        if self.profile is not None:
+            self.profile_file = os.path.join(log_dir, base_name + ".prof")
+            self.profile.dump_stats(self.profile_file)
+
+        self.log_file = os.path.join(log_dir, base_name + ".json")
+        with open(self.log_file, "w") as f:
+            json.dump({
+                "operator": self.name,
+                "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+                "status": status,
+                "seconds": round(self.seconds, 4),
+                "phases": {name: round(seconds, 4) for name, seconds in self.phases.items()},
+                "counters": self.counters,
+                "messages": self.messages,
+                "profile": self.profile_file,
+            }, f, indent=1)
+
+
+def log_directory(scene, run):
+    """Directory of the run logs: the scene setting, or a folder in the system temp directory.
+
+    Without a log directory set, a run only gets a log when it prints to
+    the console or is profiled. Returns None when no log is written.
+    """
+    if scene.lm_fs_log_dir:
+        return bpy.path.abspath(scene.lm_fs_log_dir)
+    if run.verbose or run.profile is not None:
+        return os.path.join(tempfile.gettempdir(), "lm_fs_logs")
+    return None
+
+
+def begin_run(context, name):
+    """Start instrumenting an operator run. Returns None when nested in another run, which gets the data"""
+    global _run
+    if _run is not None:
+        return None
+    _run = LM_FS_Run(name, context.scene.lm_fs_verbose, context.scene.lm_fs_profile)
+    return _run
+
+
+def end_run(context, run, status='FINISHED'):
+    """Finish a run started by begin_run, write its log and show its summary in the panel"""
+    global _run
+    if run is None:
+        return None
+    _run = None
+    try:
+        run.finish(log_directory(context.scene, run), status)
+    except OSError as e:
+        print("Unable to write FollowShapes log:", e)
+    context.window_manager.lm_fs_last_run = run.name + ": " + run.summary()
+    if run.verbose:
+        print(run.name, run.summary(), "- log:", run.log_file)
+    return run
+
+
+def discard_run():
+    """Drop the current run without writing its log, when its operator can't end it"""
+    global _run
+    if _run is not None and _run.profile is not None:
+        _run.profile.disable()
+    _run = None
+
+
+def profiled(execute):
+    """Decorator for operator execute methods: instrument the run and add its summary to the report"""
+    @functools.wraps(execute)
+    def wrapper(self, context):
+        run = begin_run(context, self.bl_idname)
+        result = {'CANCELLED'}
+        try:
+            result = execute(self, context)
+        finally:
+            end_run(context, run, "+".join(sorted(result)))
+        if run is not None and 'FINISHED' in result:
+            self.report({'INFO'}, self.bl_label + ": " + run.summary())
+        return result
+    return wrapper
+
+
+def record_phase(name, seconds):
+    if _run is not None:
+        _run.phases[name] = _run.phases.get(name, 0.0) + seconds
+    if _enabled:
+        _phase_times[name] = _phase_times.get(name, 0.0) + seconds
+
+
+def count(name, amount=1):
+    """Add to a counter of the current run"""
+    if _run is not None:
+        _run.counters[name] = _run.counters.get(name, 0) + amount
+
+
+def log(*values):
+    """Log a message of the current run, printed to the console only in verbose mode or outside runs"""
+    message = " ".join(str(value) for value in values)
+    if _run is None:
+        print(message)
+        return
+    _run.messages.append([round(time.perf_counter() - _run.start, 4), message])
+    if _run.verbose:
+        print(message)
+
+
+class LM_FS_PhaseTimer:
+    """Splits a run in consecutive phases: each lap is charged to the phase it closes"""
+
+    def __init__(self):
+        self.last = time.perf_counter()
+
+    def lap(self, name):
+        now = time.perf_counter()
+        record_phase(name, now - self.last)
+        self.last = now
+
+
+@contextmanager
+def phase(name):
+    """Charge the time spent in the block to a phase"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(name, time.perf_counter() - start)
+
+
+@persistent
+def lm_fs_profiler_load_post(*_args):
+    """A modal run doesn't survive loading a file, don't let it swallow the next runs"""
+    discard_run()
+
+
+def register():
+    if lm_fs_profiler_load_post not in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.append(lm_fs_profiler_load_post)
+
+
+def unregister():
+    if lm_fs_profiler_load_post in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(lm_fs_profiler_load_post)
+    discard_run()
@@ -0,0 +1,252 @@
+# LM LM_GPFollowShapes: Make Grease Pencil follow mesh animation
+# Copyright (C) 2025 Luca Malisan
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Bulk creation of the rig controls, without operators and mode switches
+
+import bpy
+import mathutils
+from .LM_FS_Profiler import log
+
+RIG_SUFFIX = "_RIG"
+# Bone custom property: distance from the bone to the farthest control merged into it
+GROUP_RADIUS_PROP = "lm_fs_group_radius"
+
+
+class LM_FS_Control:
+    """A control point of the rig, bound to a triangle of the source mesh"""
+
+    __slots__ = ("name", "position", "triangle", "vertices", "radius")
+
+    def __init__(self, name, position, triangle, vertices, radius=0.0):
+        self.name = name
+        self.position = position
+        self.triangle = triangle
+        self.vertices = vertices
+        # Distance to the farthest control merged into this one
+        self.radius = radius
+
+
+def frame_rig_name(scene, target_gp, frame_number):
+    """Name of the armature holding the bones of a single frame (per frame layout)"""
+    return scene.lm_fs_prefix + target_gp.name + "_F" + str(frame_number) + RIG_SUFFIX
+
+
+def shared_rig_name(scene, target_gp):
+    """Name of the armature holding the bones of all the frames (shared layout)"""
+    return scene.lm_fs_prefix + target_gp.name + RIG_SUFFIX
+
+
+def frame_bone_collection_name(frame_number):
+    """Name of the bone collection of a frame in the shared rig"""
+    return "F" + str(frame_number)
+
+
+def find_frame_rig(scene, target_gp, frame_number):
+    """Rig deforming the drawings of a frame, and the bones of that frame.
+
+    The per frame rig is looked up first, then the frame bone collection
+    of the shared rig. Returns (None, []) when the frame isn't rigged.
+    """
+    rig = bpy.data.objects.get(frame_rig_name(scene, target_gp, frame_number))
+    if rig is not None and rig.type == 'ARMATURE':
+        return rig, list(rig.data.bones)
+
+    rig = bpy.data.objects.get(shared_rig_name(scene, target_gp))
+    if rig is not None and rig.type == 'ARMATURE':
+        bone_collection = rig.data.collections.get(frame_bone_collection_name(frame_number))
+        if bone_collection is not None:
+            return rig, list(bone_collection.bones)
+
+    return None, []
+
+
+def set_collection_hidden(context, collection, hidden):
+    """Hide or show a collection in the viewport and in renders"""
+    for lc in context.view_layer.layer_collection.children:
+        if lc.collection == collection:
+            lc.hide_viewport = hidden
+            break
+    collection.hide_render = hidden
+
+
+def set_bone_envelope(bone, size):
+    """Set the envelope of a control bone (edit bone or bone) from the envelope distance.
+
+    The radius of a bone standing for merged controls grows by the
+    distance to the farthest of them, so it reaches their points too.
+    """
+    group_radius = bone.get(GROUP_RADIUS_PROP, 0.0)
+    bone.envelope_distance = size * 0.8
+    bone.head_radius = size * 0.2 + group_radius
+    bone.tail_radius = size * 0.1 + group_radius
+
+
+def create_control_empties(context, collection, controls, source_mesh, size):
+    """Create one empty per control, parented to the three vertices of its triangle.
+
+    Empties are created with bpy.data and the parent inverse matrices are
+    set directly, so edit mode and selection are never touched. Returns
+    the empties in the same order as controls.
+    """
+    empties = []
+    for control in controls:
+        empty = bpy.data.objects.new(control.name, None)
+        empty.empty_display_type = 'SPHERE'
+        empty.empty_display_size = size
+        empty.location = control.position
+        collection.objects.link(empty)
+
+        empty.parent = source_mesh
+        empty.parent_type = 'VERTEX_3'
+        empty.parent_vertices = control.vertices
+        empties.append(empty)
+
+    if not empties:
+        return empties
+
+    # A single update evaluates the vertex parent matrices of all the empties
+    context.view_layer.update()
+
+    # Keep every empty where it was created, as parent_set(type='VERTEX_TRI') does
+    for empty in empties:
+        parent_matrix = empty.matrix_world @ empty.matrix_basis.inverted()
+        empty.matrix_parent_inverse = parent_matrix.inverted_safe()
+
+    return empties
+
+
+def create_control_bones(context, armature_obj, controls, targets, size):
+    """Create one bone per control following its target object.
+
+    All the edit bones are created in a single edit mode session, then
+    the Copy Transforms constraints are added in one pass over the pose
+    bones. Returns the bone names in the same order as controls.
+    """
+    armature_data = armature_obj.data
+    tail_offset = mathutils.Vector((0, size * 0.1, 0))
+
+    context.view_layer.objects.active = armature_obj
+    bpy.ops.object.mode_set(mode='EDIT')
+    bone_names = []
+    for control in controls:
+        bone = armature_data.edit_bones.new(control.name)
+        bone.head = control.position
+        bone.tail = control.position + tail_offset
+        if control.radius > 0.0:
+            bone[GROUP_RADIUS_PROP] = control.radius
+        set_bone_envelope(bone, size)
+        bone_names.append(bone.name)
+    bpy.ops.object.mode_set(mode='OBJECT')
+
+    # Pose bones are available once out of edit mode
+    pose_bones = armature_obj.pose.bones
+    for bone_name, target in zip(bone_names, targets):
+        constraint = pose_bones[bone_name].constraints.new('COPY_TRANSFORMS')
+        constraint.name = f"CopyTransforms_{target.name}"
+        constraint.target = target
+
+    return bone_names
+
+
+def control_targets(armature_obj, bone_names):
+    """Objects followed by the given control bones"""
+    targets = []
+    for bone_name in bone_names:
+        pose_bone = armature_obj.pose.bones.get(bone_name)
+        if pose_bone is None:
+            continue
+        for constraint in pose_bone.constraints:
+            if constraint.type == 'COPY_TRANSFORMS' and constraint.target is not None:
+                targets.append(constraint.target)
+    return targets
+
+
+def remove_control_bones(context, armature_obj, bone_names):
+    """Remove control bones, and the empties they follow, in a single edit session.
+
+    The armature must be visible to enter edit mode.
+    """
+    for target in control_targets(armature_obj, bone_names):
+        if target.type == 'EMPTY':
+            bpy.data.objects.remove(target, do_unlink=True)
+
+    context.view_layer.objects.active = armature_obj
+    bpy.ops.object.mode_set(mode='EDIT')
+    edit_bones = armature_obj.data.edit_bones
+    for bone_name in bone_names:
+        bone = edit_bones.get(bone_name)
+        if bone is not None:
+            edit_bones.remove(bone)
+    bpy.ops.object.mode_set(mode='OBJECT')
+
+
+def remove_shared_frame_bones(context, target_gp, frame_number):
+    """Remove the bones, empties and vertex groups of a frame from the shared rig, if any"""
+    rig = bpy.data.objects.get(shared_rig_name(context.scene, target_gp))
+    if rig is None or rig.type != 'ARMATURE':
+        return
+    bone_collection = rig.data.collections.get(frame_bone_collection_name(frame_number))
+    if bone_collection is None:
+        return
+
+    bone_names = [bone.name for bone in bone_collection.bones]
+    for bone_name in bone_names:
+        vertex_group = target_gp.vertex_groups.get(bone_name)
+        if vertex_group is not None:
+            target_gp.vertex_groups.remove(vertex_group)
+
+    # Edit mode needs the rig visible
+    empties_collection = bpy.data.collections.get(rig.name + "_CTRL")
+    if empties_collection is not None:
+        set_collection_hidden(context, empties_collection, False)
+    remove_control_bones(context, rig, bone_names)
+    rig.data.collections.remove(bone_collection)
+    if empties_collection is not None:
+        set_collection_hidden(context, empties_collection, True)
+    log("Removed", len(bone_names), "bones of frame", frame_number, "from", rig.name)
+
+
+def remove_frame_rig(context, target_gp, frame_number):
+    """Remove everything rigging a frame: its per frame rig or its bones in the shared rig.
+
+    The per frame rig goes with its empties, its armature modifier, the
+    target vertex groups of its bones and the parenting to it.
+    """
+    scene = context.scene
+    rig = bpy.data.objects.get(frame_rig_name(scene, target_gp, frame_number))
+    if rig is not None and rig.type == 'ARMATURE':
+        for bone in rig.data.bones:
+            vertex_group = target_gp.vertex_groups.get(bone.name)
+            if vertex_group is not None:
+                target_gp.vertex_groups.remove(vertex_group)
+        for modifier in [modifier for modifier in target_gp.modifiers if modifier.type == 'GREASE_PENCIL_ARMATURE' and modifier.object == rig]:
+            target_gp.modifiers.remove(modifier)
+        if target_gp.parent == rig:
+            target_gp.parent = None
+            target_gp.parent_type = 'OBJECT'
+
+        armature_data = rig.data
+        datablocks = {rig}
+        empties_collection = bpy.data.collections.get(rig.name + "_CTRL")
+        if empties_collection is not None:
+            datablocks.update(empties_collection.objects)
+            datablocks.add(empties_collection)
+        log("Removing rig", rig.name, "of frame", frame_number)
+        bpy.data.batch_remove(list(datablocks))
+        if armature_data.users == 0:
+            bpy.data.armatures.remove(armature_data)
+
+    remove_shared_frame_bones(context, target_gp, frame_number)
@@ -0,0 +1,126 @@
+# LM LM_GPFollowShapes: Make Grease Pencil follow mesh animation
+# Copyright (C) 2025 Luca Malisan
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Rig-free surface binding: each point follows a triangle of the source mesh
+# The binding is stored on the drawing attributes and evaluated by the
+# Geometry Nodes modifier of LM_FS_GeometryNodes, the drawings are never moved
+
+import numpy as np
+from .LM_FS_DrawingData import read_attribute, write_attribute, remove_attributes
+
+
+def binding_attribute_names(prefix):
+    """Names of the drawing attributes holding the surface binding"""
+    return (prefix + "bind_tri", prefix + "bind_bary", prefix + "bind_offset")
+
+
+def vertex_attribute_names(prefix):
+    """Names of the drawing attributes holding the source vertices of the bound triangle"""
+    return (prefix + "bind_v0", prefix + "bind_v1", prefix + "bind_v2")
+
+
+def compute_surface_binding(snapshot, positions, max_distance=0.0):
+    """Bind world space positions to the nearest triangles of a mesh snapshot.
+
+    Returns the triangle index of each point (-1 when farther than
+    max_distance), its barycentric coordinates on that triangle and its
+    offset along the triangle normal.
+    """
+    count = len(positions)
+    triangles = np.full(count, -1, dtype=np.int32)
+    for point_idx, co in enumerate(positions.tolist()):
+        closest_triangle = snapshot.find_nearest(co, max_distance)
+        if closest_triangle is not None:
+            triangles[point_idx] = closest_triangle
+
+    barycentrics = np.zeros((count, 3), dtype=np.float32)
+    offsets = np.zeros(count, dtype=np.float32)
+    bound = triangles >= 0
+    if not bound.any():
+        return triangles, barycentrics, offsets
+
+    barycentrics[bound], offsets[bound] = triangle_coordinates(snapshot, triangles[bound], positions[bound])
+    return triangles, barycentrics, offsets
+
+
+def triangle_coordinates(snapshot, triangles, points):
+    """Barycentric coordinates and normal offsets of world space points on the given triangles"""
+    a, b, c = (snapshot.vertices[snapshot.triangles[triangles, i]] for i in range(3))
+    normals = snapshot.triangle_normals(triangles)
+
+    # Split each point in an offset along the normal and a projection on the triangle plane
+    offset = np.einsum("ij,ij->i", points - a, normals)
+    projected = points - normals * offset[:, None]
+
+    v0, v1, v2 = b - a, c - a, projected - a
+    d00 = np.einsum("ij,ij->i", v0, v0)
+    d01 = np.einsum("ij,ij->i", v0, v1)
+    d11 = np.einsum("ij,ij->i", v1, v1)
+    d20 = np.einsum("ij,ij->i", v2, v0)
+    d21 = np.einsum("ij,ij->i", v2, v1)
+    denom = d00 * d11 - d01 * d01
+    denom[np.abs(denom) < 1e-12] = 1e-12
+    v = (d11 * d20 - d01 * d21) / denom
+    w = (d00 * d21 - d01 * d20) / denom
+
+    return np.stack((1.0 - v - w, v, w), axis=1), offset
+
+
+def evaluate_surface_binding(snapshot, triangles, barycentrics, offsets):
+    """Rebuild world space positions of bound points from a mesh snapshot"""
+    a, b, c = (snapshot.vertices[snapshot.triangles[triangles, i]] for i in range(3))
+    normals = snapshot.triangle_normals(triangles)
+    return (a * barycentrics[:, 0:1] + b * barycentrics[:, 1:2] + c * barycentrics[:, 2:3]
+            + normals * offsets[:, None])
+
+
+def write_surface_binding(drawing, prefix, triangles, barycentrics, offsets):
+    """Store a surface binding on the drawing attributes"""
+    tri_name, bary_name, offset_name = binding_attribute_names(prefix)
+    write_attribute(drawing, tri_name, 'INT', triangles)
+    write_attribute(drawing, bary_name, 'FLOAT_VECTOR', barycentrics)
+    write_attribute(drawing, offset_name, 'FLOAT', offsets)
+
+
+def write_surface_vertices(drawing, prefix, snapshot, triangles):
+    """Store the source vertex indices of the bound triangles (-1 when unbound).
+
+    The indices are those of the evaluated mesh, which is also what the
+    surface bind node group samples through its Object Info node.
+    """
+    vertices = np.full((len(triangles), 3), -1, dtype=np.int32)
+    bound = triangles >= 0
+    vertices[bound] = snapshot.triangles[triangles[bound]]
+    for name, column in zip(vertex_attribute_names(prefix), vertices.T):
+        write_attribute(drawing, name, 'INT', column)
+
+
+def read_surface_binding(drawing, prefix):
+    """Read the surface binding of a drawing, None if it isn't bound"""
+    tri_name, bary_name, offset_name = binding_attribute_names(prefix)
+    triangles = read_attribute(drawing, tri_name, 'INT')
+    if triangles is None:
+        return None
+    barycentrics = read_attribute(drawing, bary_name, 'FLOAT_VECTOR')
+    offsets = read_attribute(drawing, offset_name, 'FLOAT')
+    if barycentrics is None or offsets is None:
+        return None
+    return triangles, barycentrics, offsets
+
+
+def clear_surface_binding(drawing, prefix):
+    """Remove the surface binding attributes of a drawing"""
+    remove_attributes(drawing, binding_attribute_names(prefix) + vertex_attribute_names(prefix))
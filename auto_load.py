@@ -37,15 +37,16 @@ def register():
 
 
 def unregister():
-    for cls in reversed(ordered_classes):
-        bpy.utils.unregister_class(cls)
-
+    # Reverse of register: module properties may use the classes, remove them first
     for module in modules:
         if module.__name__ == __name__:
             continue
         if hasattr(module, "unregister"):
             module.unregister()
 
+    for cls in reversed(ordered_classes):
+        bpy.utils.unregister_class(cls)
+
 
 # Import modules
 #################################################
@@ -0,0 +1,248 @@
+# LM LM_GPFollowShapes: Make Grease Pencil follow mesh animation
+# Copyright (C) 2025 Luca Malisan
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Headless batch binding: Bind All Frames on many .blend files with a pool of background Blender processes
+#
+# Usage:
+#   blender -b --python tools/lm_fs_batch.py -- shot_010.blend shot_020.blend \
+#       --source Face --target FaceLines --jobs 4 --report batch_report.json
+#
+# Each file is opened by its own "blender -b <file> --python tools/lm_fs_batch.py -- --worker ..."
+# process, bound with the same logic as the Bind All Frames button and saved
+# (in place, or in --output-dir). The driver can also run from a plain Python.
+
+import argparse
+import concurrent.futures
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ADDON_MODULE = "lm_gpfollowshapes"
+
+
+def script_args():
+    """Arguments after "--", the ones Blender leaves to the script"""
+    if "--" in sys.argv:
+        return sys.argv[sys.argv.index("--") + 1:]
+    return sys.argv[1:]
+
+
+def parse_args(args):
+    parser = argparse.ArgumentParser(prog="lm_fs_batch", description="Bind Grease Pencil to mesh on many .blend files")
+    parser.add_argument("files", nargs="*", help=".blend files to bind")
+    parser.add_argument("--source", required=True, help="Name of the source mesh object")
+    parser.add_argument("--target", required=True, help="Name of the target Grease Pencil object")
+    parser.add_argument("--prefix", default=None, help="Prefix for FollowShapes vertex groups and bones")
+    parser.add_argument("--bind-mode", choices=["RIG", "SURFACE"], default=None)
+    parser.add_argument("--rig-layout", choices=["PER_FRAME", "SHARED"], default=None)
+    parser.add_argument("--distance", type=float, default=None, help="Max distance (0 = no limit)")
+    parser.add_argument("--simplify", type=int, default=None, help="Simplify level")
+    parser.add_argument("--expand", type=float, default=None, help="Envelope distance")
+    parser.add_argument("--output-dir", default=None, help="Save bound files here instead of overwriting them")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Number of Blender processes running at once")
+    parser.add_argument("--timeout", type=float, default=None, help="Seconds before a file is given up")
+    parser.add_argument("--blender", default=None, help="Blender executable (default: the running one, or 'blender')")
+    parser.add_argument("--report", default="lm_fs_batch_report.json", help="JSON report of the whole batch")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    return parser.parse_args(args)
+
+
+# Worker: runs inside the background Blender that opened one file
+#################################################
+
+
+def ensure_addon():
+    """Register the addon from this repository, unless it's already enabled.
+
+    Returns the package name the addon is loaded under, which differs when
+    it is installed as an extension.
+    """
+    import bpy
+    # Operators are registered in bpy.types under their bl_idname, not their class name
+    if hasattr(bpy.types, "LM_FS_OT_rigbind_all_frames"):
+        return bpy.types.LM_FS_OT_rigbind_all_frames.__module__.rsplit(".", 1)[0]
+    spec = importlib.util.spec_from_file_location(ADDON_MODULE, os.path.join(ADDON_DIR, "__init__.py"), submodule_search_locations=[ADDON_DIR])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[ADDON_MODULE] = module
+    spec.loader.exec_module(module)
+    module.register()
+    return ADDON_MODULE
+
+
+def addon_module(package, name):
+    """A module of the addon loaded by ensure_addon, e.g. addon_module(package, "LM_FS_Profiler")"""
+    return sys.modules[package + "." + name]
+
+
+def apply_settings(scene, options):
+    """Copy the binding parameters given on the command line to the scene properties"""
+    import bpy
+    for name in (options.source, options.target):
+        if name not in bpy.data.objects:
+            raise KeyError(f"Object '{name}' not found in {bpy.data.filepath}")
+    scene.lm_fs_source_mesh = bpy.data.objects[options.source]
+    scene.lm_fs_target_gp = bpy.data.objects[options.target]
+
+    settings = {
+        "lm_fs_prefix": options.prefix,
+        "lm_fs_bind_mode": options.bind_mode,
+        "lm_fs_rig_layout": options.rig_layout,
+        "lm_fs_distance": options.distance,
+        "lm_fs_simplify": options.simplify,
+        "lm_fs_expand": options.expand,
+    }
+    for prop, value in settings.items():
+        if value is not None:
+            setattr(scene, prop, value)
+
+
+def run_worker(options, report_path):
+    """Bind all the frames of the open file and write its JSON report"""
+    import bpy
+    report = {"file": bpy.data.filepath, "status": "error", "frames": 0, "seconds": 0.0, "error": None}
+    start = time.perf_counter()
+    try:
+        package = ensure_addon()
+        scene = bpy.context.scene
+        apply_settings(scene, options)
+
+        # Same keyframe plan as the one Bind All Frames is going to follow
+        plan_keyframes = addon_module(package, "LM_FS_FramePlan").plan_keyframes
+        report["frames"] = len(plan_keyframes(scene.lm_fs_target_gp))
+
+        result = bpy.ops.lm_fs.rigbind_all_frames()
+        if 'FINISHED' not in result:
+            raise RuntimeError("Bind All Frames returned " + ", ".join(sorted(result)))
+
+        output = bpy.data.filepath
+        if options.output_dir:
+            os.makedirs(options.output_dir, exist_ok=True)
+            output = os.path.join(options.output_dir, os.path.basename(bpy.data.filepath))
+        bpy.ops.wm.save_as_mainfile(filepath=output)
+
+        report["output"] = output
+        report["status"] = "ok"
+    except Exception as e:
+        traceback.print_exc()
+        report["error"] = str(e)
+        report["traceback"] = traceback.format_exc()
+    report["seconds"] = round(time.perf_counter() - start, 3)
+
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+    return report["status"] == "ok"
+
+
+# Driver: fans the files out to the worker processes
+#################################################
+
+
+def blender_executable(options):
+    if options.blender:
+        return options.blender
+    try:
+        import bpy
+        return bpy.app.binary_path
+    except ImportError:
+        return "blender"
+
+
+def worker_command(options, blend_file, report_path):
+    """Command line of the background Blender binding one file"""
+    command = [blender_executable(options), "-b", blend_file, "--python", os.path.abspath(__file__), "--",
+               "--worker", "--report", report_path, "--source", options.source, "--target", options.target]
+    for flag, value in (("--prefix", options.prefix), ("--bind-mode", options.bind_mode),
+                        ("--rig-layout", options.rig_layout),
+                        ("--distance", options.distance), ("--simplify", options.simplify),
+                        ("--expand", options.expand), ("--output-dir", options.output_dir)):
+        if value is not None:
+            command += [flag, str(value)]
+    return command
+
+
+def bind_file(options, blend_file):
+    """Run one worker and collect its report, also when it crashes or times out"""
+    handle, report_path = tempfile.mkstemp(prefix="lm_fs_", suffix=".json")
+    os.close(handle)
+    os.remove(report_path)
+
+    start = time.perf_counter()
+    report = {"file": blend_file, "status": "error", "frames": 0, "seconds": 0.0, "error": None}
+    try:
+        process = subprocess.run(worker_command(options, blend_file, report_path), capture_output=True, text=True, timeout=options.timeout)
+        if os.path.exists(report_path):
+            with open(report_path) as f:
+                report = json.load(f)
+        else:
+            report["error"] = f"Blender exited with code {process.returncode} without a report"
+            report["log"] = (process.stdout + process.stderr)[-4000:]
+    except subprocess.TimeoutExpired:
+        report["error"] = f"Timed out after {options.timeout} seconds"
+    finally:
+        if os.path.exists(report_path):
+            os.remove(report_path)
+
+    report["file"] = blend_file
+    report["wall_seconds"] = round(time.perf_counter() - start, 3)
+    return report
+
+
+def run_batch(options):
+    """Bind all the files with at most options.jobs Blender processes at once"""
+    start = time.perf_counter()
+    file_reports = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, options.jobs)) as pool:
+        futures = [pool.submit(bind_file, options, blend_file) for blend_file in options.files]
+        for future in concurrent.futures.as_completed(futures):
+            report = future.result()
+            file_reports[report["file"]] = report
+            print(f"[{len(file_reports)}/{len(futures)}] {report['status'].upper()} {report['file']} "
+                  f"({report['frames']} frames, {report['wall_seconds']}s)" + (f": {report['error']}" if report["error"] else ""))
+
+    reports = [file_reports[blend_file] for blend_file in options.files]
+    summary = {
+        "jobs": options.jobs,
+        "files": len(reports),
+        "succeeded": sum(1 for report in reports if report["status"] == "ok"),
+        "failed": sum(1 for report in reports if report["status"] != "ok"),
+        "seconds": round(time.perf_counter() - start, 3),
+        "reports": reports,
+    }
+    with open(options.report, "w") as f:
+        json.dump(summary, f, indent=2)
+    print(f"Bound {summary['succeeded']}/{summary['files']} files in {summary['seconds']}s, report written to {options.report}")
+    return summary["failed"] == 0
+
+
+def main():
+    options = parse_args(script_args())
+    if options.worker:
+        ok = run_worker(options, options.report)
+    else:
+        # Each file once, in the given order
+        options.files = list(dict.fromkeys(os.path.abspath(blend_file) for blend_file in options.files))
+        ok = run_batch(options)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+# LM LM_GPFollowShapes: Make Grease Pencil follow mesh animation
+# Copyright (C) 2025 Luca Malisan
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Bind-time benchmark suite: per-phase timings of Bind Current Frame and Bind All Frames
+#
+# Usage:
+#   blender -b --factory-startup --python tools/lm_fs_bench_bind.py -- --baseline bind_baseline.json
+#
+# Generated scenes grow from 1k faces / 100 points to 200k faces / 50k points
+# (--sizes, or --matrix for every faces x points combination). The first run
+# writes the baseline file; the next ones compare against it and exit with an
+# error when a phase is slower than the baseline by more than --threshold.
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+if TOOLS_DIR not in sys.path:
+    sys.path.insert(0, TOOLS_DIR)
+
+from lm_fs_batch import script_args, blender_executable
+
+DEFAULT_SIZES = ["1000:100", "10000:1000", "50000:10000", "200000:50000"]
+OPERATORS = ("rigbind", "rigbind_all_frames")
+
+
+def parse_args(args):
+    parser = argparse.ArgumentParser(prog="lm_fs_bench_bind", description="Time the phases of a FollowShapes bind")
+    parser.add_argument("--sizes", nargs="+", default=DEFAULT_SIZES, help="FACES:POINTS scene sizes")
+    parser.add_argument("--matrix", action="store_true", help="Run every combination of the faces and points of --sizes")
+    parser.add_argument("--operators", nargs="+", choices=OPERATORS, default=list(OPERATORS))
+    parser.add_argument("--config", default="rig", help="Configuration, see CONFIGS in lm_fs_bench_scene.py")
+    parser.add_argument("--keyframes", type=int, default=4, help="Keyframes bound by Bind All Frames")
+    parser.add_argument("--spacing", type=float, default=None, help="Pick control points by spacing instead of simplify")
+    parser.add_argument("--simplify", type=int, default=None, help="Simplify level")
+    parser.add_argument("--baseline", default="lm_fs_bench_bind_baseline.json", help="Baseline file, written when missing")
+    parser.add_argument("--update-baseline", action="store_true", help="Overwrite the baseline with this run")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown of a phase, as a fraction of the baseline")
+    parser.add_argument("--min-seconds", type=float, default=0.05, help="Slowdowns smaller than this are noise, never a regression")
+    parser.add_argument("--blender", default=None, help="Blender executable (default: the running one, or 'blender')")
+    parser.add_argument("--output", default="lm_fs_bench_bind.json", help="JSON results of this run")
+    parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    return parser.parse_args(args)
+
+
+def benchmark_cases(options):
+    """(operator, faces, points) of each case, smallest scenes first"""
+    sizes = [tuple(int(value) for value in size.split(":")) for size in options.sizes]
+    if options.matrix:
+        sizes = [(faces, points) for faces in sorted({faces for faces, _points in sizes}) for points in sorted({points for _faces, points in sizes})]
+    return [(operator, faces, points) for faces, points in sizes for operator in options.operators]
+
+
+def case_name(operator, faces, points):
+    return f"{operator}:{faces}f:{points}p"
+
+
+# Worker: runs inside the background Blender benchmarking one case
+#################################################
+
+
+def run_worker(options, case):
+    import bpy
+    from lm_fs_batch import ensure_addon, addon_module
+    from lm_fs_bench_scene import build_scene, apply_config
+
+    operator, faces, points = case.split(":")
+    faces, points = int(faces.rstrip("f")), int(points.rstrip("p"))
+
+    profiler = addon_module(ensure_addon(), "LM_FS_Profiler")
+
+    # Strokes of up to 100 points
+    strokes = max(1, points // 100)
+    keyframes = options.keyframes if operator == "rigbind_all_frames" else 1
+    scene = bpy.context.scene
+    build_scene(faces, keyframes, strokes, max(2, points // strokes))
+    apply_config(scene, options.config, options.spacing, options.simplify)
+    scene.frame_set(scene.frame_start)
+
+    profiler.enable_profiling()
+    start = time.perf_counter()
+    getattr(bpy.ops.lm_fs, operator)()
+    total = time.perf_counter() - start
+    phases = profiler.phase_times()
+    profiler.enable_profiling(False)
+
+    return {"case": case, "total_seconds": round(total, 4), "phases": {name: round(seconds, 4) for name, seconds in phases.items()}}
+
+
+# Driver: one background Blender per case, then the comparison with the baseline
+#################################################
+
+
+def worker_command(options, case, output):
+    command = [blender_executable(options), "-b", "--factory-startup", "--python", os.path.abspath(__file__), "--",
+               "--worker", case, "--output", output, "--config", options.config, "--keyframes", str(options.keyframes)]
+    if options.spacing is not None:
+        command += ["--spacing", str(options.spacing)]
+    if options.simplify is not None:
+        command += ["--simplify", str(options.simplify)]
+    return command
+
+
+def run_case(options, case):
+    handle, output = tempfile.mkstemp(prefix="lm_fs_bench_", suffix=".json")
+    os.close(handle)
+    try:
+        process = subprocess.run(worker_command(options, case, output), capture_output=True, text=True)
+        with open(output) as f:
+            content = f.read()
+    finally:
+        os.remove(output)
+    if content:
+        return json.loads(content)
+    return {"case": case, "error": f"Blender exited with code {process.returncode}", "log": (process.stdout + process.stderr)[-4000:]}
+
+
+def compare(results, baseline, threshold, min_seconds):
+    """Phases (and totals) slower than the baseline by more than threshold, as readable lines"""
+    baseline_results = {result["case"]: result for result in baseline.get("results", []) if "error" not in result}
+    regressions = []
+    for result in results:
+        reference = baseline_results.get(result["case"])
+        if reference is None or "error" in result:
+            continue
+        timings = dict(result["phases"], total=result["total_seconds"])
+        reference_timings = dict(reference["phases"], total=reference["total_seconds"])
+        for name, seconds in timings.items():
+            reference_seconds = reference_timings.get(name)
+            if reference_seconds is None:
+                continue
+            if seconds > reference_seconds * (1.0 + threshold) and seconds - reference_seconds > min_seconds:
+                regressions.append(f"{result['case']} {name}: {seconds:.3f}s, baseline {reference_seconds:.3f}s (+{(seconds / max(reference_seconds, 1e-9) - 1.0) * 100.0:.0f}%)")
+    return regressions
+
+
+def run_suite(options):
+    results = []
+    for operator, faces, points in benchmark_cases(options):
+        case = case_name(operator, faces, points)
+        result = run_case(options, case)
+        results.append(result)
+        if "error" in result:
+            print(f"{case}: {result['error']}")
+        else:
+            print(f"{case}: {result['total_seconds']:.3f}s (" + ", ".join(f"{name} {seconds:.3f}s" for name, seconds in result["phases"].items()) + ")")
+
+    report = {
+        "benchmark": "bind",
+        "parameters": {"config": options.config, "keyframes": options.keyframes, "spacing": options.spacing, "simplify": options.simplify},
+        "results": results,
+    }
+    with open(options.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print("Results written to", options.output)
+
+    ok = all("error" not in result for result in results)
+    if options.update_baseline or not os.path.exists(options.baseline):
+        with open(options.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print("Baseline written to", options.baseline)
+        return ok
+
+    with open(options.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, options.threshold, options.min_seconds)
+    for regression in regressions:
+        print("REGRESSION", regression)
+    if not regressions:
+        print(f"No phase slower than the baseline by more than {options.threshold * 100.0:.0f}%")
+    return ok and not regressions
+
+
+def main():
+    options = parse_args(script_args())
+    if options.worker:
+        import bpy
+        result = run_worker(options, options.worker)
+        result["blender"] = bpy.app.version_string
+        with open(options.output, "w") as f:
+            json.dump(result, f, indent=2)
+        ok = True
+    else:
+        ok = run_suite(options)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+# LM LM_GPFollowShapes: Make Grease Pencil follow mesh animation
+# Copyright (C) 2025 Luca Malisan
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Playback benchmark: time the depsgraph evaluation of bound Grease Pencil objects
+#
+# Usage:
+#   blender -b --factory-startup --python tools/lm_fs_bench_playback.py -- \
+#       --configs rig rig-shared surface baked --faces 20000 --keyframes 8 --strokes 20 --points 100 \
+#       --output playback.json
+#
+# Each configuration runs in its own background Blender, so peak memory is
+# measured per configuration. The driver can also run from a plain Python.
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+if TOOLS_DIR not in sys.path:
+    sys.path.insert(0, TOOLS_DIR)
+
+from lm_fs_batch import script_args, blender_executable
+
+
+def parse_args(args):
+    parser = argparse.ArgumentParser(prog="lm_fs_bench_playback", description="Time playback of bound Grease Pencil objects")
+    parser.add_argument("--configs", nargs="+", default=["rig", "rig-shared", "surface", "baked"],
+                        help="Configurations to compare, see CONFIGS in lm_fs_bench_scene.py")
+    parser.add_argument("--faces", type=int, default=10000, help="Faces of the source mesh")
+    parser.add_argument("--keyframes", type=int, default=4, help="Keyframes of the Grease Pencil")
+    parser.add_argument("--strokes", type=int, default=20, help="Strokes per keyframe")
+    parser.add_argument("--points", type=int, default=100, help="Points per stroke")
+    parser.add_argument("--frames", type=int, default=48, help="Length of the played frame range")
+    parser.add_argument("--repeat", type=int, default=3, help="Times the frame range is played, after a warm up pass")
+    parser.add_argument("--spacing", type=float, default=None, help="Pick control points by spacing instead of simplify")
+    parser.add_argument("--simplify", type=int, default=None, help="Simplify level")
+    parser.add_argument("--blender", default=None, help="Blender executable (default: the running one, or 'blender')")
+    parser.add_argument("--output", default="lm_fs_bench_playback.json", help="JSON results")
+    parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    options = parser.parse_args(args)
+    # Frame times are averaged over frames * repeat timed evaluations
+    if options.repeat < 1:
+        parser.error("--repeat must be at least 1")
+    if options.frames < 1:
+        parser.error("--frames must be at least 1")
+    return options
+
+
+def peak_memory_mb():
+    """Peak resident memory of this process, None where it can't be measured"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes elsewhere
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+# Worker: runs inside the background Blender benchmarking one configuration
+#################################################
+
+
+def run_worker(options, config):
+    import bpy
+    from lm_fs_batch import ensure_addon
+    from lm_fs_bench_scene import CONFIGS, build_scene, apply_config, scene_counts
+
+    ensure_addon()
+    scene = bpy.context.scene
+    frame_start, frame_end = 1, options.frames
+    _mesh_obj, gp_obj = build_scene(options.faces, options.keyframes, options.strokes, options.points, frame_start, frame_end)
+    apply_config(scene, config, options.spacing, options.simplify)
+
+    start = time.perf_counter()
+    bpy.ops.lm_fs.rigbind_all_frames()
+    bind_seconds = time.perf_counter() - start
+
+    bake_seconds = None
+    if CONFIGS[config].get("bake"):
+        scene.lm_fs_cache_dir = tempfile.mkdtemp(prefix="lm_fs_bench_")
+        start = time.perf_counter()
+        bpy.ops.lm_fs.bake()
+        bake_seconds = time.perf_counter() - start
+
+    counts = scene_counts(scene, gp_obj)
+
+    # Warm up pass, then timed passes over the whole range
+    frame_times = []
+    for repeat in range(options.repeat + 1):
+        for frame_number in range(frame_start, frame_end + 1):
+            start = time.perf_counter()
+            scene.frame_set(frame_number)
+            bpy.context.evaluated_depsgraph_get()
+            if repeat:
+                frame_times.append((time.perf_counter() - start) * 1000.0)
+
+    return {
+        "config": config,
+        "bind_seconds": round(bind_seconds, 3),
+        "bake_seconds": round(bake_seconds, 3) if bake_seconds is not None else None,
+        "frames_timed": len(frame_times),
+        "mean_ms": round(sum(frame_times) / len(frame_times), 3),
+        "p95_ms": round(percentile(frame_times, 0.95), 3),
+        "min_ms": round(min(frame_times), 3),
+        "max_ms": round(max(frame_times), 3),
+        "peak_memory_mb": peak_memory_mb(),
+        **counts,
+    }
+
+
+# Driver: one background Blender per configuration, one after the other
+#################################################
+
+
+def worker_command(options, config, output):
+    command = [blender_executable(options), "-b", "--factory-startup", "--python", os.path.abspath(__file__), "--",
+               "--worker", config, "--output", output,
+               "--faces", str(options.faces), "--keyframes", str(options.keyframes), "--strokes", str(options.strokes),
+               "--points", str(options.points), "--frames", str(options.frames), "--repeat", str(options.repeat)]
+    if options.spacing is not None:
+        command += ["--spacing", str(options.spacing)]
+    if options.simplify is not None:
+        command += ["--simplify", str(options.simplify)]
+    return command
+
+
+def run_benchmark(options):
+    results = []
+    for config in options.configs:
+        handle, output = tempfile.mkstemp(prefix="lm_fs_bench_", suffix=".json")
+        os.close(handle)
+        try:
+            process = subprocess.run(worker_command(options, config, output), capture_output=True, text=True)
+            with open(output) as f:
+                content = f.read()
+            if content:
+                result = json.loads(content)
+            else:
+                result = {"config": config, "error": f"Blender exited with code {process.returncode}", "log": (process.stdout + process.stderr)[-4000:]}
+        finally:
+            os.remove(output)
+        results.append(result)
+        if "error" in result:
+            print(f"{config}: {result['error']}")
+        else:
+            print(f"{config}: mean {result['mean_ms']}ms, p95 {result['p95_ms']}ms, "
+                  f"{result['objects']} objects, {result['bones']} bones, {result['constraints']} constraints")
+
+    report = {
+        "benchmark": "playback",
+        "parameters": {key: getattr(options, key) for key in ("faces", "keyframes", "strokes", "points", "frames", "repeat", "spacing", "simplify")},
+        "results": results,
+    }
+    with open(options.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print("Results written to", options.output)
+    return all("error" not in result for result in results)
+
+
+def main():
+    options = parse_args(script_args())
+    if options.worker:
+        import bpy
+        result = run_worker(options, options.worker)
+        result["blender"] = bpy.app.version_string
+        with open(options.output, "w") as f:
+            json.dump(result, f, indent=2)
+        ok = True
+    else:
+        ok = run_benchmark(options)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+# LM LM_GPFollowShapes: Make Grease Pencil follow mesh animation
+# Copyright (C) 2025 Luca Malisan
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Synthetic scenes for the FollowShapes benchmarks: an animated mesh and a Grease Pencil drawn on it
+#
+# Imported by the benchmark scripts in this directory, inside a background Blender.
+
+import math
+import numpy as np
+import bpy
+
+# Addon settings of each benchmarked configuration
+CONFIGS = {
+    "rig": {"lm_fs_bind_mode": 'RIG', "lm_fs_rig_layout": 'PER_FRAME'},
+    "rig-shared": {"lm_fs_bind_mode": 'RIG', "lm_fs_rig_layout": 'SHARED'},
+    "surface": {"lm_fs_bind_mode": 'SURFACE'},
+    "baked": {"lm_fs_bind_mode": 'RIG', "lm_fs_rig_layout": 'PER_FRAME', "bake": True},
+}
+
+
+def clear_scene():
+    """Remove every object of the startup file"""
+    bpy.data.batch_remove(list(bpy.data.objects))
+
+
+def grease_pencil_datablocks():
+    # compatibilty with 4.3/4.4, where Grease Pencil v3 data has its own collection
+    return bpy.data.grease_pencils_v3 if hasattr(bpy.data, "grease_pencils_v3") else bpy.data.grease_pencils
+
+
+def build_mesh(face_count, frame_start, frame_end):
+    """Square grid of about face_count quads with a shape key animated over the frame range"""
+    side = max(1, int(math.ceil(math.sqrt(face_count))))
+    coords = np.linspace(-1.0, 1.0, side + 1, dtype=np.float32)
+    xs, ys = np.meshgrid(coords, coords, indexing='ij')
+    vertices = np.stack((xs.ravel(), ys.ravel(), np.zeros(xs.size, dtype=np.float32)), axis=1)
+
+    rows, cols = np.meshgrid(np.arange(side), np.arange(side), indexing='ij')
+    corner = (rows * (side + 1) + cols).ravel()
+    loops = np.stack((corner, corner + side + 1, corner + side + 2, corner + 1), axis=1).astype(np.int32)
+
+    mesh = bpy.data.meshes.new("BenchMesh")
+    mesh.vertices.add(len(vertices))
+    mesh.vertices.foreach_set("co", vertices.ravel())
+    mesh.loops.add(loops.size)
+    mesh.loops.foreach_set("vertex_index", loops.ravel())
+    mesh.polygons.add(len(loops))
+    # Quads only, the size of each face follows from the start of the next one
+    mesh.polygons.foreach_set("loop_start", np.arange(0, loops.size, 4, dtype=np.int32))
+    mesh.update()
+    mesh.validate()
+
+    mesh_obj = bpy.data.objects.new("BenchMesh", mesh)
+    bpy.context.scene.collection.objects.link(mesh_obj)
+
+    # A wave moving the surface up and down
+    mesh_obj.shape_key_add(name="Basis")
+    wave = mesh_obj.shape_key_add(name="Wave")
+    waved = vertices.copy()
+    waved[:, 2] = 0.2 * np.sin(vertices[:, 0] * math.pi * 2.0) * np.cos(vertices[:, 1] * math.pi)
+    wave.data.foreach_set("co", waved.ravel())
+    wave.value = 0.0
+    wave.keyframe_insert("value", frame=frame_start)
+    wave.value = 1.0
+    wave.keyframe_insert("value", frame=frame_end)
+    return mesh_obj
+
+
+def build_grease_pencil(keyframes, strokes, points, frame_start, frame_end, seed=0):
+    """Grease Pencil with strokes lying just above the grid, on keyframes spread over the frame range"""
+    rng = np.random.default_rng(seed)
+    gp_data = grease_pencil_datablocks().new("BenchLines")
+    gp_obj = bpy.data.objects.new("BenchLines", gp_data)
+    bpy.context.scene.collection.objects.link(gp_obj)
+    layer = gp_data.layers.new("Lines")
+
+    span = max(1, frame_end - frame_start + 1)
+    keyframe_numbers = sorted({frame_start + (k * span) // max(1, keyframes) for k in range(keyframes)})
+    stroke_ys = np.linspace(-0.9, 0.9, strokes, dtype=np.float32)
+    stroke_xs = np.linspace(-0.9, 0.9, points, dtype=np.float32)
+    for frame_number in keyframe_numbers:
+        drawing = layer.frames.new(frame_number).drawing
+        drawing.add_strokes([points] * strokes)
+        positions = np.zeros((strokes, points, 3), dtype=np.float32)
+        positions[:, :, 0] = stroke_xs[None, :]
+        positions[:, :, 1] = stroke_ys[:, None] + rng.normal(0.0, 0.01, (strokes, points))
+        positions[:, :, 2] = 0.01
+        drawing.attributes["position"].data.foreach_set("vector", positions.ravel())
+        radius = drawing.attributes.get("radius")
+        if radius is not None:
+            radius.data.foreach_set("value", np.full(strokes * points, 0.005, dtype=np.float32))
+    return gp_obj
+
+
+def build_scene(face_count, keyframes, strokes, points, frame_start=1, frame_end=48):
+    """Fresh scene with the benchmark mesh and Grease Pencil set as FollowShapes source and target"""
+    clear_scene()
+    scene = bpy.context.scene
+    scene.frame_start = frame_start
+    scene.frame_end = frame_end
+    scene.frame_set(frame_start)
+    mesh_obj = build_mesh(face_count, frame_start, frame_end)
+    gp_obj = build_grease_pencil(keyframes, strokes, points, frame_start, frame_end)
+    scene.lm_fs_source_mesh = mesh_obj
+    scene.lm_fs_target_gp = gp_obj
+    bpy.context.view_layer.update()
+    return mesh_obj, gp_obj
+
+
+def apply_config(scene, config, spacing=None, simplify=None):
+    """Set the addon scene properties of a benchmarked configuration"""
+    for prop, value in CONFIGS[config].items():
+        if prop.startswith("lm_fs_"):
+            setattr(scene, prop, value)
+    if spacing is not None:
+        scene.lm_fs_control_selection = 'CLUSTER'
+        scene.lm_fs_spacing = spacing
+    if simplify is not None:
+        scene.lm_fs_simplify = simplify
+
+
+def scene_counts(scene, target_gp):
+    """Size of what the binding added to the scene"""
+    armatures = [obj for obj in scene.objects if obj.type == 'ARMATURE']
+    return {
+        "objects": len(scene.objects),
+        "armatures": len(armatures),
+        "bones": sum(len(obj.data.bones) for obj in armatures),
+        "constraints": sum(len(obj.constraints) for obj in scene.objects)
+                       + sum(len(pose_bone.constraints) for obj in armatures for pose_bone in obj.pose.bones),
+        "target_modifiers": len(target_gp.modifiers),
+        "target_vertex_groups": len(target_gp.vertex_groups),
+    }